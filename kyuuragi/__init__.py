@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+"""
+kyuuragi: 月別収支状況・売上比較ブックを DB 向けのロング形式 CSV に整えるツール群。
+
+各処理は `python -m kyuuragi <サブコマンド>` で実行する（cli.py 参照）。
+各スクリプトはパッケージ内の相対 import を使うので、従来の `python merge_facts_long.py` の
+ような直接実行はできない（ImportError になる）。単体で動かすときは `python -m kyuuragi.merge_facts_long`。
+pandas / openpyxl / jpholiday などの重い依存はサブコマンド実行時にだけ読み込むため、
+ここでは何も import しない。
+"""
+
+__version__ = "0.1.0"
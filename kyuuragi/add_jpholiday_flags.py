@@ -1,42 +1,38 @@
+"""
+売上CSVに 祝祭日前日 / 祝祭日 / 振替休日 のフラグ列を付けるスクリプト。
+"""
+
 import pandas as pd
-from datetime import timedelta
-import jpholiday
+
+from .utils_calendar import DATE_KEY_COL, HOLIDAY_COLS, calendar_for, parse_date_clamped, to_date_key
 
 # 入力CSVファイルのパス
 input_path = "６年・５年度売上比較_新_ABEFH_with_date_merged.csv"
 
-# データ読み込み
-df = pd.read_csv(input_path)
-
-# カラムA（日付）をdatetimeに変換
-df.iloc[:, 0] = pd.to_datetime(df.iloc[:, 0], errors="coerce")
-
-# フラグカラムを追加（初期値 0）
-df["祝祭日前日"] = 0
-df["祝祭日"] = 0
-df["振替休日"] = 0
-
-# 各日付について判定
-for i, date in enumerate(df.iloc[:, 0]):
-    if pd.notna(date):
-        # 振替休日か？
-        name = jpholiday.is_holiday_name(date)
-        if name and "振替" in name:
-            df.loc[i, "振替休日"] = 1
-        # 通常の祝祭日（振替以外）
-        elif jpholiday.is_holiday(date):
-            df.loc[i, "祝祭日"] = 1
-
-        # 祝祭日前日判定（翌日が祝祭日 or 振替休日）
-        next_name = jpholiday.is_holiday_name(date + timedelta(days=1))
-        if jpholiday.is_holiday(date + timedelta(days=1)):
-            df.loc[i, "祝祭日前日"] = 1
-
-
 # 出力ファイルのパス
 output_path = "６年・５年度売上比較_祝日フラグ付き.csv"
 
-# 保存
-df.to_csv(output_path, index=False, encoding="utf-8-sig")
-
-output_path
+def main():
+    # データ読み込み
+    df = pd.read_csv(input_path)
+
+    # カラムA（日付）をdatetimeに変換し、整数の日付キーを付与
+    # （2023-02-30 のような存在しない日は fix-dates と同じく月末に丸める）
+    date_col = df.columns[0]
+    df[date_col] = pd.to_datetime(df[date_col].map(parse_date_clamped), errors="coerce")
+    df[DATE_KEY_COL] = to_date_key(df[date_col])
+
+    # 祝日フラグはカレンダー表から日付キーで結合（行ごとの jpholiday 呼び出しはしない）
+    flag_cols = HOLIDAY_COLS
+    cal = calendar_for(df[DATE_KEY_COL])[[DATE_KEY_COL] + flag_cols]
+    df = df.drop(columns=[c for c in flag_cols if c in df.columns])
+    df = df.merge(cal, on=DATE_KEY_COL, how="left")
+    df[flag_cols] = df[flag_cols].fillna(0).astype(int)
+
+    # 保存
+    df.to_csv(output_path, index=False, encoding="utf-8-sig")
+    print(f"[OK] {output_path} を出力しました。行数={len(df)}")
+    return output_path
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,9 @@
 
 前提:
 - utils_period.py に compute_period_end_from_book_and_sheet があること
-- utils_long_builder.py に build_long_records / pick_remark_label_and_amount_columns / parse_amount_token があること
+- utils_long_builder.py に build_long_records / infer_remark_roles / parse_amount_token があること
   （重複「備考」列の “ラベル列＋金額列” 自動判定ロジック込み）
+- utils_layout.py の LayoutRegistry で、同じ様式のシートは見出し行・列の検出を省略
 """
 
 import re
@@ -15,16 +16,23 @@ import pandas as pd
 from pathlib import Path
 import unicodedata
 
-from utils_period import compute_period_end_from_book_and_sheet
-from utils_long_builder import (
+from .utils_period import compute_period_end_from_book_and_sheet
+from .utils_long_builder import (
+    RemarkRoles,
     build_long_records,
-    pick_remark_label_and_amount_columns,
+    infer_remark_roles,
     parse_amount_token,
 )
+from .utils_layout import LayoutRegistry
 
 # ================= 設定 =================
 EXCEL_PATH = "令和５年度月別収支状況.xlsx"   # 実ファイル名に合わせて
 SHEET_NAME = "2022-04"                       # 例：対象シート名（末日=period_endに使う）
+LAYOUT_FILE = "layout_registry.json"         # シートレイアウトの登録簿（None なら毎回検出）
+
+# 勘定科目・備考の列見出し候補（見出しゆらぎ対応）
+COL_CAND_ACCOUNT = ["勘定科目", "勘　定　科　目", "科目", "項目名", "節", "account"]
+COL_CAND_REMARK  = ["備考", "備　　　　　　　　考", "摘要", "内訳", "remark"]
 
 # ================= ユーティリティ =================
 def _norm_space(s: str) -> str:
@@ -34,33 +42,30 @@ def _norm_space(s: str) -> str:
     s = unicodedata.normalize("NFKC", str(s))
     return re.sub(r"[\s\u3000\u2000-\u200B]+", "", s)
 
-def load_table_with_header_detection(path: str | Path, sheet_name=0) -> pd.DataFrame:
-    """
-    シート全体を header=None で読み、上部から「勘定科目」「備考/摘要/内訳」を含む行を
-    見出し行として自動検出。以降を本表として DataFrame を返す。
-    """
+def read_raw_sheet(path: str | Path, sheet_name=0) -> pd.DataFrame:
+    """シート全体を header=None で読む（見出し行の検出・指紋計算の元データ）"""
     p = Path(path)
     if not p.exists():
         raise FileNotFoundError(f"ファイルが見つかりません: {p.resolve()}")
+    return pd.read_excel(p, sheet_name=sheet_name, header=None, engine="openpyxl")
 
-    raw = pd.read_excel(p, sheet_name=sheet_name, header=None, engine="openpyxl")
-
+def detect_header_row(raw: pd.DataFrame) -> int:
+    """上部から「勘定科目」「備考/摘要/内訳」を含む行を見出し行として検出し、その行番号を返す"""
     want_cols = ["勘定科目", "備考", "摘要", "内訳", "勘　定　科　目", "備　　　　　　　　考"]
-    header_row_idx = None
     for i in range(min(len(raw), 150)):
         row_vals = [_norm_space(v) for v in raw.iloc[i].tolist()]
         hit = sum(any(_norm_space(w) in rv for rv in row_vals) for w in want_cols)
         if hit >= 2:
-            header_row_idx = i
-            break
+            return i
 
-    if header_row_idx is None:
-        # デバッグ支援：上部プレビュー
-        raise ValueError(
-            "見出し行を検出できませんでした。上部プレビュー:\n"
-            + raw.iloc[:60, :12].to_string(index=True)
-        )
+    # デバッグ支援：上部プレビュー
+    raise ValueError(
+        "見出し行を検出できませんでした。上部プレビュー:\n"
+        + raw.iloc[:60, :12].to_string(index=True)
+    )
 
+def table_from_raw(raw: pd.DataFrame, header_row_idx: int) -> pd.DataFrame:
+    """header_row_idx 行目を見出しにして、以降を本表として返す"""
     header = raw.iloc[header_row_idx].tolist()
     df = raw.iloc[header_row_idx + 1:].copy()
     df.columns = header
@@ -70,6 +75,14 @@ def load_table_with_header_detection(path: str | Path, sheet_name=0) -> pd.DataF
     df = df.dropna(how="all").reset_index(drop=True)
     return df
 
+def load_table_with_header_detection(path: str | Path, sheet_name=0) -> pd.DataFrame:
+    """
+    シート全体を header=None で読み、上部から「勘定科目」「備考/摘要/内訳」を含む行を
+    見出し行として自動検出。以降を本表として DataFrame を返す。
+    """
+    raw = read_raw_sheet(path, sheet_name)
+    return table_from_raw(raw, detect_header_row(raw))
+
 def autodetect_col(df: pd.DataFrame, cand_account: list[str], cand_remark: list[str]) -> tuple[str, str]:
     """
     列名の候補（全角空白含む表記揺れを考慮）から、実列名（df.columns中の“見た目の列名”）を返す。
@@ -109,20 +122,53 @@ def ensure_period_end_column(df: pd.DataFrame, period_end) -> pd.DataFrame:
     out["period_end"] = pd.to_datetime(period_end)
     return out
 
+def load_sheet_with_layout(
+    path: str | Path,
+    sheet_name,
+    registry: LayoutRegistry,
+    cand_account: list[str],
+    cand_remark: list[str],
+) -> tuple[pd.DataFrame, str, str, RemarkRoles]:
+    """
+    レイアウト登録簿に指紋が一致するものがあれば、見出し行・列・備考の役割を位置で直接使う。
+    無ければ従来どおり検出して登録する。roles.method は一致時 "cached"。
+    """
+    raw = read_raw_sheet(path, sheet_name)
+    fp, layout = registry.lookup(raw)
+    if layout is not None:
+        df = table_from_raw(raw, layout["header_row"])
+        col_account = df.columns[layout["account_col"]]
+        col_remark = df.columns[layout["remark_col"]]
+        roles = RemarkRoles(layout["label_col"], layout["amount_col"], 1.0, "cached")
+        return df, col_account, col_remark, roles
+
+    header_row_idx = detect_header_row(raw)
+    df = table_from_raw(raw, header_row_idx)
+    col_account, col_remark = autodetect_col(df, cand_account, cand_remark)
+    roles = infer_remark_roles(df, col_remark)
+    cols = list(df.columns)
+    registry.register(
+        fp, raw, header_row_idx,
+        account_col=cols.index(col_account),
+        remark_col=cols.index(col_remark),
+        label_col=roles.label_idx,
+        amount_col=roles.amount_idx,
+    )
+    return df, col_account, col_remark, roles
+
 # ================= メイン =================
 def main():
-    # 1) 表読み込み（上部帯・飾り行の自動スキップ）
-    df = load_table_with_header_detection(EXCEL_PATH, sheet_name=SHEET_NAME)
+    # 1) 表読み込み（上部帯・飾り行の自動スキップ）＋ 勘定科目・備考の列を自動検出（見出しゆらぎ対応）
+    #    同じ様式のシートはレイアウト登録簿から位置で直接読む
+    registry = LayoutRegistry(LAYOUT_FILE)
+    df, col_account, col_remark, roles = load_sheet_with_layout(
+        EXCEL_PATH, SHEET_NAME, registry, COL_CAND_ACCOUNT, COL_CAND_REMARK
+    )
+    registry.save()
 
     # 2) シート名からその月の末日を推定（utils_period）
     period_end = compute_period_end_from_book_and_sheet(EXCEL_PATH, SHEET_NAME)
 
-    # 3) 勘定科目・備考の列を自動検出（見出しゆらぎ対応）
-    COL_CAND_ACCOUNT = ["勘定科目", "勘　定　科　目", "科目", "項目名", "account"]
-    COL_CAND_REMARK  = ["備考", "備　　　　　　　　考", "摘要", "内訳", "remark"]
-
-    col_account, col_remark = autodetect_col(df, COL_CAND_ACCOUNT, COL_CAND_REMARK)
-
     # --- デバッグ出力（任意） ---
     dups = [c for c in df.columns if list(df.columns).count(c) > 1]
     print("[DEBUG] duplicated headers:", dups)
@@ -130,23 +176,25 @@ def main():
     print("[DEBUG] col_account:", col_account, "/ col_remark:", col_remark)
 
     # ラベル/金額の候補を確認（同名「備考」列が複数ある場合の役割推定）
-    try:
-        lbl_ser, amt_ser = pick_remark_label_and_amount_columns(df, col_remark)
-        print("[DEBUG] label samples:", lbl_ser.dropna().astype(str).head(5).tolist())
-        if amt_ser is not None:
-            print("[DEBUG] amount samples:", [parse_amount_token(x) for x in amt_ser.head(5).tolist()])
-        else:
-            print("[DEBUG] amount column: <inline or not provided>")
-    except Exception as e:
-        print("[WARN] 備考列の役割推定に失敗:", e)
-
-    # 4) ロング化（ラベル＋金額の2列型 / 1列に混在型 の両対応）
-    facts_long = build_long_records(df, col_account, col_remark)
+    print(f"[DEBUG] remark roles: label={roles.label_idx} amount={roles.amount_idx} "
+          f"confidence={roles.confidence:.2f} ({roles.method})")
+    lbl_ser = df.iloc[:, roles.label_idx]
+    amt_ser = df.iloc[:, roles.amount_idx] if roles.amount_idx is not None else None
+    print("[DEBUG] label samples:", lbl_ser.dropna().astype(str).head(5).tolist())
+    if amt_ser is not None:
+        print("[DEBUG] amount samples:", [parse_amount_token(x) for x in amt_ser.head(5).tolist()])
+    else:
+        print("[DEBUG] amount column: <inline or not provided>")
+
+    # 3) ロング化（ラベル＋金額の2列型 / 1列に混在型 の両対応）
+    #    役割は決定済みなので位置で渡し、build_long_records 側での再推定を避ける
+    remark_spec = df.iloc[:, [roles.label_idx, roles.amount_idx]] if amt_ser is not None else lbl_ser
+    facts_long = build_long_records(df, col_account, remark_spec)
 
     if facts_long.empty:
         print("[WARN] 備考から (品目, 金額) を抽出できませんでした。表の体裁（品目列・金額列の有無）をご確認ください。")
     else:
-        # 5) 期末日を列付与し、保存
+        # 4) 期末日を列付与し、保存
         facts_long = ensure_period_end_column(facts_long, period_end)
         facts_long = facts_long[["period_end", "account", "remark_item", "amount"]].copy()
         # 日付は YYYY-MM-DD で統一
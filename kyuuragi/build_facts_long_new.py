@@ -1,15 +1,21 @@
 # -*- coding: utf-8 -*-
 # save as: build_simple_db_csv.py
+"""
+全シートの A/E/F 列から 日付 / 勘定科目 / 品目 / 金額 のロング形式CSVを作るスクリプト。
+"""
+
 import pandas as pd
 import numpy as np
 import re
 import os
-import calendar
-from datetime import date
 from pathlib import Path
 
+from .utils_calendar import REIWA_OFFSET, month_end, year_of_fiscal_month
+from .utils_delta import write_delta
+
 EXCEL_PATH = "令和６年度月別収支状況.xlsx"   # 必要に応じてフルパスに
 OUT_CSV    = "facts_long_2.csv"                # 出力先
+DELTA      = True                              # 前回実行との差分（*_delta_<実行ID>.csv）も出力する
 
 def extract_reiwa_year_from_filename(path):
     base = os.path.basename(path)
@@ -17,7 +23,7 @@ def extract_reiwa_year_from_filename(path):
     if not m:
         return None
     num_str = m.group(1).translate(str.maketrans("０１２３４５６７８９", "0123456789"))
-    return 2018 + int(num_str)  # 令和1=2019
+    return REIWA_OFFSET + int(num_str)  # 令和1=2019
 
 def parse_sheet_month_and_year(sheet_name, fiscal_start_year=None):
     name = str(sheet_name)
@@ -27,16 +33,13 @@ def parse_sheet_month_and_year(sheet_name, fiscal_start_year=None):
     m2 = re.search(r"(1[0-2]|0?[1-9])\s*月", name)
     if m2 and fiscal_start_year:
         mo = int(m2.group(1))
-        return (fiscal_start_year, mo) if mo>=4 else (fiscal_start_year+1, mo)
+        return year_of_fiscal_month(fiscal_start_year, mo), mo
     m3 = re.fullmatch(r"\s*(1[0-2]|0?[1-9])\s*", name)
     if m3 and fiscal_start_year:
         mo = int(m3.group(1))
-        return (fiscal_start_year, mo) if mo>=4 else (fiscal_start_year+1, mo)
+        return year_of_fiscal_month(fiscal_start_year, mo), mo
     return None, None
 
-def last_day_of_month(y, m):
-    return calendar.monthrange(y, m)[1]
-
 def clean_text(x):
     if pd.isna(x): return np.nan
     s = str(x).replace("\u3000", "")
@@ -79,7 +82,7 @@ def main():
         if y is None or mo is None:
             # 解析できないシートは無視
             continue
-        d = date(y, mo, last_day_of_month(y, mo))
+        d = month_end(y, mo)
 
         # ターゲット整形
         out = pd.DataFrame({
@@ -108,6 +111,8 @@ def main():
     # 保存（Excel互換のため BOM 付与）
     result.to_csv(OUT_CSV, index=False, encoding="utf-8-sig")
     print(f"[OK] {OUT_CSV} を出力しました。行数={len(result)}")
+    if DELTA:
+        print(f"[OK] 前回との差分: {write_delta(result, OUT_CSV)}")
 
 if __name__ == "__main__":
     main()
@@ -1,16 +1,37 @@
+"""
+facts_long_merged.csv を 収入+ / 支出- に符号調整し、損益サマリーを出力するスクリプト。
+"""
+
 import pandas as pd
 from pathlib import Path
 import numpy as np
 import re
 
+from .utils_calendar import fiscal_columns
+from .utils_delta import write_delta
+
 csv_path = Path("facts_long_merged.csv")
-df = pd.read_csv(csv_path, encoding="utf-8-sig")
+out_path = Path("facts_long_signed.csv")
+# 前回実行との差分（*_delta_<実行ID>.csv）も出力する
+DELTA = True
 
 # カラム名
 account_name_col = "勘定科目"
 amount_col = "金額"
 date_col = "日付"
 
+# 集計レベル（名前, グループ化キー）。内訳を増やすときはここに足すだけでよい
+# （明細は最細粒度で1回だけ集計し、各レベルはその小さな表から積み上げる）
+SUMMARY_LEVELS = [
+    ("全体",          []),
+    ("収支区分",      ["収支区分"]),
+    ("会計年度",      ["会計年度"]),
+    ("四半期",        ["会計年度", "四半期"]),
+    ("年月",          ["年月"]),
+    ("年月×勘定科目", ["年月", "勘定科目"]),
+]
+summary_levels_path = Path("facts_summary_levels.csv")
+
 # 1) 勘定コードが無いので、勘定名から種別を判定
 income_names = {"商品売上高（4111）", "手数料収入（4112）", "その他の収入（4114）"}
 
@@ -28,9 +49,6 @@ def normalize(s):
     s = re.sub(r"\s+", " ", s)
     return s
 
-df["_acc_norm"] = df[account_name_col].map(normalize)
-income_names_norm = {normalize(n) for n in income_names}
-
 # 2) 金額を数値化（カンマ除去など）
 def to_number(x):
     if pd.isna(x):
@@ -41,57 +59,109 @@ def to_number(x):
     except Exception:
         return np.nan
 
-df["_amount_raw"] = df[amount_col].map(to_number)
-
-# 3) 収入/支出フラグ
-df["_is_income"] = df["_acc_norm"].isin(income_names_norm)
-
-# 4) 収入は +abs、支出は -abs に正規化
-df["金額_符号調整後"] = np.where(
-    df["_is_income"],
-    df["_amount_raw"].abs(),
-    -df["_amount_raw"].abs()
-)
-
-# 5) 合計（全体）
-total_income = df.loc[df["_is_income"], "金額_符号調整後"].sum()
-total_expense = df.loc[~df["_is_income"], "金額_符号調整後"].sum()  # 既に負符号
-net_profit = df["金額_符号調整後"].sum()
-
-summary_overall = pd.DataFrame({
-    "区分": ["収入(+)", "支出(-)", "当期損益(=)"],
-    "金額": [total_income, total_expense, net_profit]
-})
-
-# 6) 月次集計
-monthly_summary = None
-if date_col in df.columns:
-    dt = pd.to_datetime(df[date_col], errors="coerce")
-    ym = dt.dt.to_period("M").astype(str)
-    df["_年月"] = ym
-    monthly_summary = (
-        df.groupby("_年月", dropna=True)["金額_符号調整後"]
-        .sum()
+def summarize_levels(df: pd.DataFrame, levels=SUMMARY_LEVELS, value_col: str = "金額") -> pd.DataFrame:
+    """
+    levels の全キーの和集合で明細を1回だけソート＋集計し（grouping sets の最細粒度）、
+    各レベルはその集計表からロールアップして縦に積んだ表を返す。
+    列: 集計レベル, <全キー>, 金額合計, 件数
+    """
+    keys = []
+    for _, level_keys in levels:
+        for k in level_keys:
+            if k not in keys:
+                keys.append(k)
+
+    base = (
+        df.sort_values(keys)
+        .groupby(keys, sort=False, dropna=False)[value_col]
+        .agg(金額合計="sum", 件数="size")
         .reset_index()
-        .rename(columns={"_年月": "年月", "金額_符号調整後": "損益合計"})
-        .sort_values("年月")
     )
 
-# 7) 明細出力
-out_path = Path("facts_long_signed.csv")
-df_out_cols = [c for c in df.columns if not c.startswith("_")]
-df[df_out_cols].to_csv(out_path, index=False, encoding="utf-8-sig")
-
-# 8) サマリーも CSV に保存（お好みで）
-summary_overall.to_csv("facts_summary_overall.csv", index=False, encoding="utf-8-sig")
-if monthly_summary is not None:
-    monthly_summary.to_csv("facts_summary_monthly.csv", index=False, encoding="utf-8-sig")
-
-# 9) コンソールにざっくり表示
-print(f"[OK] 明細を {out_path} に出力しました。")
-print("\n=== 損益サマリー（全体） ===")
-print(summary_overall)
-
-if monthly_summary is not None:
-    print("\n=== 月次損益サマリー（先頭5行） ===")
-    print(monthly_summary.head())
+    parts = []
+    for name, level_keys in levels:
+        if level_keys:
+            part = base.groupby(level_keys, dropna=False)[["金額合計", "件数"]].sum().reset_index()
+        else:
+            part = base[["金額合計", "件数"]].sum().to_frame().T
+        part.insert(0, "集計レベル", name)
+        parts.append(part)
+    out = pd.concat(parts, ignore_index=True).reindex(columns=["集計レベル"] + keys + ["金額合計", "件数"])
+    out["件数"] = out["件数"].astype(int)
+    return out
+
+def main():
+    df = pd.read_csv(csv_path, encoding="utf-8-sig")
+
+    df["_acc_norm"] = df[account_name_col].map(normalize)
+    income_names_norm = {normalize(n) for n in income_names}
+
+    df["_amount_raw"] = df[amount_col].map(to_number)
+
+    # 3) 収入/支出フラグ
+    df["_is_income"] = df["_acc_norm"].isin(income_names_norm)
+
+    # 4) 収入は +abs、支出は -abs に正規化
+    df["金額_符号調整後"] = np.where(
+        df["_is_income"],
+        df["_amount_raw"].abs(),
+        -df["_amount_raw"].abs()
+    )
+
+    # 5) 集計用の縦持ち表（明細には残さない）
+    facts = pd.DataFrame({
+        "収支区分": np.where(df["_is_income"], "収入", "支出"),
+        "勘定科目": df[account_name_col],
+        "金額": df["金額_符号調整後"],
+    }, index=df.index)
+    if date_col in df.columns:
+        dt = pd.to_datetime(df[date_col], errors="coerce")
+        facts["年月"] = dt.dt.to_period("M").astype(str)
+        facts = facts.join(fiscal_columns(df[date_col]))
+    levels = [(name, keys) for name, keys in SUMMARY_LEVELS if all(k in facts.columns for k in keys)]
+    summary_levels = summarize_levels(facts, levels)
+
+    # 6) 全体・月次サマリー（従来形式）は集計レベル表から取り出す
+    def _level(name: str) -> pd.DataFrame:
+        return summary_levels[summary_levels["集計レベル"] == name]
+
+    by_kind = _level("収支区分").set_index("収支区分")["金額合計"]
+    summary_overall = pd.DataFrame({
+        "区分": ["収入(+)", "支出(-)", "当期損益(=)"],
+        "金額": [by_kind.get("収入", 0.0), by_kind.get("支出", 0.0), _level("全体")["金額合計"].sum()]
+    })
+
+    monthly_summary = None
+    if "年月" in facts.columns:
+        monthly_summary = (
+            _level("年月")[["年月", "金額合計"]]
+            .rename(columns={"金額合計": "損益合計"})
+            .sort_values("年月")
+            .reset_index(drop=True)
+        )
+
+    # 7) 明細出力
+    df_out_cols = [c for c in df.columns if not c.startswith("_")]
+    df[df_out_cols].to_csv(out_path, index=False, encoding="utf-8-sig")
+    delta_counts = write_delta(df[df_out_cols], out_path) if DELTA else None
+
+    # 8) サマリーも CSV に保存（お好みで）
+    summary_overall.to_csv("facts_summary_overall.csv", index=False, encoding="utf-8-sig")
+    if monthly_summary is not None:
+        monthly_summary.to_csv("facts_summary_monthly.csv", index=False, encoding="utf-8-sig")
+    summary_levels.to_csv(summary_levels_path, index=False, encoding="utf-8-sig")
+
+    # 9) コンソールにざっくり表示
+    print(f"[OK] 明細を {out_path} に出力しました。")
+    if delta_counts is not None:
+        print(f"[OK] 前回との差分: {delta_counts}")
+    print(f"[OK] 集計レベル {len(levels)} 種を {summary_levels_path} に出力しました。行数={len(summary_levels)}")
+    print("\n=== 損益サマリー（全体） ===")
+    print(summary_overall)
+
+    if monthly_summary is not None:
+        print("\n=== 月次損益サマリー（先頭5行） ===")
+        print(monthly_summary.head())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+kyuuragi のサブコマンド一覧と起動口。
+
+  python -m kyuuragi <サブコマンド> [-C 作業フォルダ]
+
+サブコマンドのモジュールは実行時にだけ import する（--help や軽い処理で
+pandas 等の読み込み時間を払わないように）。入出力ファイル名は各モジュール
+冒頭の設定値に従い、作業フォルダからの相対パスで解決される。
+"""
+from __future__ import annotations
+import argparse
+import importlib
+import os
+import sys
+
+# サブコマンド名 → (モジュール名, 説明)
+COMMANDS: dict[str, tuple[str, str]] = {
+    "rename-sheets":       ("rename_sheets_western",  "売上比較ブックのシート名（令和◯年◯月）を西暦 YYYY-M に改名"),
+    "split-revenue":       ("revenue_sheet_splitter", "売上比較ブックを当年（ABEFH）と前年（CDGI）に分割"),
+    "holidays":            ("add_jpholiday_flags",    "売上CSVに祝祭日・振替休日・祝祭日前日フラグを付与"),
+    "fix-dates":           ("date_change",            "存在しない日付を月末に丸めて ISO 形式で出力"),
+    "build-facts":         ("build_facts_long",       "月次シートの備考から period_end/account/remark_item/amount を抽出"),
+    "build-facts-ae":      ("build_facts_long_new",   "全シートの A/E/F 列から 日付/勘定科目/品目/金額 を抽出"),
+    "merge":               ("merge_facts_long",       "facts_long CSV を結合・重複除去（品目正規化・日付キー付与）"),
+    "signed":              ("build_signed_facts",     "収入+/支出- に符号調整し、損益サマリーを出力"),
+    "reconcile":           ("reconcile_facts",        "備考の抽出金額を勘定科目ごとの金額と突合し、ずれ・未解析・重複を一覧化"),
+    "report":              ("export_report_xlsx",     "明細とサマリーを年月シート別の xlsx レポートに書き出す"),
+    "yoy":                 ("yoy_compare",            "会計月×勘定×品目で年度間の差額・比率を出力"),
+    "export-requirements": ("export_requirements",    "実行時依存だけの requirements.txt を書き出す"),
+}
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="kyuuragi", description="月別収支・売上比較データの整形ツール")
+    parser.add_argument("-C", "--directory", help="この作業フォルダに移動してから実行する")
+    sub = parser.add_subparsers(dest="command", metavar="<サブコマンド>")
+    for name, (_, help_text) in COMMANDS.items():
+        sub.add_parser(name, help=help_text, description=help_text)
+    return parser
+
+def run(command: str):
+    """サブコマンドのモジュールを import して main() を呼ぶ"""
+    module_name, _ = COMMANDS[command]
+    module = importlib.import_module(f"{__package__ or 'kyuuragi'}.{module_name}")
+    return module.main()
+
+def main(argv: list[str] | None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.command:
+        parser.print_help()
+        return 1
+    if args.directory:
+        os.chdir(args.directory)
+    run(args.command)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+# save as: export_report_xlsx.py
+"""
+符号調整済み明細（facts_long_signed.csv）とサマリーCSVから、
+Excel でそのまま見られる xlsx レポートを書き出すスクリプト。
+
+- XlsxWriter の constant_memory モードで1行ずつ書き出す（行数が増えてもメモリはほぼ一定）
+- 明細は CSV をチャンク単位で読み、年月ごとのシート（例: 2022-04）に振り分ける
+- 先頭にサマリーシート（全体 / 月次 / 集計レベル）を置き、金額・日付に書式を付ける
+"""
+
+import numbers
+from pathlib import Path
+import pandas as pd
+
+DETAIL_CSV = "facts_long_signed.csv"
+SUMMARY_CSVS = [
+    ("全体", "facts_summary_overall.csv"),
+    ("月次", "facts_summary_monthly.csv"),
+    ("集計レベル", "facts_summary_levels.csv"),
+]
+OUT_XLSX = "facts_report.xlsx"
+
+DATE_COL = "日付"
+AMOUNT_COLS = {"金額", "金額_符号調整後", "損益合計", "金額合計"}
+CHUNK_ROWS = 20000
+
+NUM_FORMAT = "#,##0;[Red]-#,##0"
+DATE_FORMAT = "yyyy-mm-dd"
+
+class _SheetWriter:
+    """1シート分の書き込み位置と書式を持つ（constant_memory なので行は必ず上から順に書く）"""
+
+    def __init__(self, wb, name: str, columns: list[str], fmts: dict):
+        self.ws = wb.add_worksheet(name)
+        self.columns = columns
+        self.fmts = fmts
+        for j, c in enumerate(columns):
+            if c == DATE_COL:
+                self.ws.set_column(j, j, 12)
+            elif c in AMOUNT_COLS:
+                self.ws.set_column(j, j, 14)
+            else:
+                self.ws.set_column(j, j, 18 if j else 22)
+        self.ws.freeze_panes(1, 0)
+        self.ws.write_row(0, 0, columns, fmts["header"])
+        self.row = 1
+
+    def write(self, values) -> None:
+        r = self.row
+        for j, (c, v) in enumerate(zip(self.columns, values)):
+            if v is None or (isinstance(v, float) and pd.isna(v)) or v is pd.NaT:
+                continue
+            if c == DATE_COL and isinstance(v, pd.Timestamp):
+                self.ws.write_datetime(r, j, v.to_pydatetime(), self.fmts["date"])
+            elif isinstance(v, numbers.Real) and not isinstance(v, bool):
+                fmt = self.fmts["num"] if c in AMOUNT_COLS else None
+                self.ws.write_number(r, j, float(v), fmt)
+            else:
+                self.ws.write_string(r, j, str(v))
+        self.row += 1
+
+def _write_summary(wb, fmts, name: str, path: Path) -> None:
+    if not path.exists():
+        return
+    df = pd.read_csv(path, encoding="utf-8-sig")
+    sheet = _SheetWriter(wb, name, list(df.columns), fmts)
+    for values in df.itertuples(index=False, name=None):
+        sheet.write(values)
+
+def export_report(detail_csv=DETAIL_CSV, out_xlsx=OUT_XLSX, summary_csvs=SUMMARY_CSVS,
+                  chunk_rows: int = CHUNK_ROWS) -> dict[str, int]:
+    """xlsx を書き出し、明細シート名 → データ行数 を返す"""
+    import xlsxwriter  # レポート出力時だけ読み込む
+
+    wb = xlsxwriter.Workbook(out_xlsx, {"constant_memory": True})
+    fmts = {
+        "header": wb.add_format({"bold": True, "bg_color": "#DDEBF7", "border": 1}),
+        "num": wb.add_format({"num_format": NUM_FORMAT}),
+        "date": wb.add_format({"num_format": DATE_FORMAT}),
+    }
+    sheets: dict[str, _SheetWriter] = {}
+    try:
+        # サマリーは小さいので先に全部書く（シート順も先頭になる）
+        for name, path in summary_csvs:
+            _write_summary(wb, fmts, name, Path(path))
+
+        # 明細：チャンクごとに年月シートへ追記
+        for chunk in pd.read_csv(detail_csv, encoding="utf-8-sig", chunksize=chunk_rows):
+            columns = list(chunk.columns)
+            dt = pd.to_datetime(chunk[DATE_COL], errors="coerce")
+            chunk[DATE_COL] = dt
+            months = dt.dt.strftime("%Y-%m").fillna("日付不明")
+            for month, values in zip(months, chunk.itertuples(index=False, name=None)):
+                sheet = sheets.get(month)
+                if sheet is None:
+                    sheet = sheets[month] = _SheetWriter(wb, month, columns, fmts)
+                sheet.write(values)
+
+        for sheet in sheets.values():
+            sheet.ws.autofilter(0, 0, max(sheet.row - 1, 0), len(sheet.columns) - 1)
+    finally:
+        wb.close()
+
+    return {name: sheet.row - 1 for name, sheet in sheets.items()}
+
+def main():
+    counts = export_report()
+    print(f"[OK] {OUT_XLSX} を出力しました。明細シート数={len(counts)} / 明細行数={sum(counts.values())}")
+
+if __name__ == "__main__":
+    main()
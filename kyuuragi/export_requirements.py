@@ -1,8 +1,10 @@
 import subprocess
+import re
+from importlib import metadata
 
-# pip freeze の結果を取得
-result = subprocess.run(["pip", "freeze"], capture_output=True, text=True)
-lines = result.stdout.strip().split("\n")
+# パイプラインが実行時に使うライブラリ（ここから依存をたどって requirements.txt を作る）
+# pip freeze をそのまま書き出すと、同じ環境にある torch / whisper などまで入ってしまうため
+RUNTIME = ["pandas", "numpy", "openpyxl", "jpholiday", "XlsxWriter"]
 
 # 除外したいライブラリ
 EXCLUDE = {
@@ -13,13 +15,47 @@ EXCLUDE = {
 # 出力ファイル名
 output_file = "requirements.txt"
 
-with open(output_file, "w", encoding="utf-8") as f:
-    for line in lines:
-        if not line.strip():
+def _canon(name: str) -> str:
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+def runtime_closure(roots: list[str]) -> set[str]:
+    """roots とその必須依存（extra 指定なし）を再帰的に集める"""
+    seen: set[str] = set()
+    stack = [_canon(r) for r in roots]
+    while stack:
+        name = stack.pop()
+        if name in seen:
             continue
-        pkg_name = line.split("==")[0].lower()
-        if pkg_name in EXCLUDE:
+        seen.add(name)
+        try:
+            reqs = metadata.requires(name) or []
+        except metadata.PackageNotFoundError:
             continue
-        f.write(line + "\n")
+        for req in reqs:
+            if "extra ==" in req:
+                continue
+            dep = re.split(r"[\s;<>=!~\[(]", req, maxsplit=1)[0]
+            stack.append(_canon(dep))
+    return seen
+
+def main():
+    # pip freeze の結果を取得
+    result = subprocess.run(["pip", "freeze"], capture_output=True, text=True)
+    lines = result.stdout.strip().split("\n")
+
+    keep = runtime_closure(RUNTIME)
+    written = 0
+    with open(output_file, "w", encoding="utf-8") as f:
+        for line in lines:
+            if not line.strip() or "==" not in line:
+                continue
+            pkg_name = _canon(line.split("==")[0])
+            if pkg_name in EXCLUDE or pkg_name not in keep:
+                continue
+            f.write(line + "\n")
+            written += 1
+
+    print(f"✅ requirements.txt を作成しました ({len(lines)} 行中 {written} 行を出力)")
 
-print(f"✅ requirements.txt を作成しました ({len(lines)} 行中 {len(lines)-len(EXCLUDE)} 行を出力)")
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,21 @@
 # save as: merge_facts_long.py
+"""
+facts_long CSV を結合・重複除去し、日付キーと 品目_正規 を付けるスクリプト。
+"""
+
 import pandas as pd
 
+from .utils_calendar import attach_date_key
+from .utils_delta import write_delta
+from .utils_item_canon import canonicalize_items
+
 FILE1 = "facts_long_2.csv"
 FILE2 = "facts_long_1113.csv"
 OUT   = "facts_long_merged.csv"
+# 品目の正規化対応表（None なら正規化列を付けない）
+ITEM_MAP = "item_canon_map.csv"
+# 前回実行との差分（*_delta_<実行ID>.csv）も出力する
+DELTA = True
 
 def main():
     df1 = pd.read_csv(FILE1)
@@ -22,8 +34,21 @@ def main():
     key_cols = list(merged.columns[:4])  # ["日付", "勘定科目", "品目", "金額"] のはず
     merged = merged.drop_duplicates(subset=key_cols, keep="first")
 
+    # 売上表など日次側とは整数キー（YYYYMMDD）で結合する
+    merged = attach_date_key(merged, date_col=date_col)
+
+    # 品目の表記ゆれを正規品目に寄せた列を追加（集計は 品目_正規 で行う）
+    if ITEM_MAP:
+        account_col, item_col = merged.columns[1], merged.columns[2]
+        merged["品目_正規"], _ = canonicalize_items(
+            merged[item_col], mapping_path=ITEM_MAP, accounts=merged[account_col]
+        )
+        print(f"[OK] {ITEM_MAP} を更新しました。品目 {merged[item_col].nunique()} → 正規品目 {merged['品目_正規'].nunique()}")
+
     merged.to_csv(OUT, index=False, encoding="utf-8-sig")
     print(f"[OK] {OUT} を出力しました。行数={len(merged)}")
+    if DELTA:
+        print(f"[OK] 前回との差分: {write_delta(merged, OUT)}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+# save as: reconcile_facts.py
+"""
+備考から抽出した品目金額の合計と、シート上の勘定科目ごとの金額（◯月執行額 列）を
+全シートまとめて突き合わせ、ずれ・未解析の備考セル・重複取り込みを一覧にするスクリプト。
+
+- シートの読み込みは build_facts_long と同じ（レイアウト登録簿を共用）
+- 集計は (period_end, account) 単位で、全シート分を1回の groupby で行う
+"""
+
+import re
+import pandas as pd
+
+from .build_facts_long import (
+    COL_CAND_ACCOUNT,
+    COL_CAND_REMARK,
+    LAYOUT_FILE,
+    _norm_space,
+    load_sheet_with_layout,
+)
+from .utils_layout import LayoutRegistry
+from .utils_long_builder import build_long_records, parse_amount_token
+from .utils_period import compute_period_end_from_book_and_sheet
+
+EXCEL_PATHS = ["令和５年度月別収支状況.xlsx"]
+OUT_CSV = "facts_reconcile.csv"
+# 勘定科目ごとの金額列の見出し候補（部分一致、'４月執行額' など）
+COL_CAND_TOTAL = ["執行額", "決算額", "実績額", "金額"]
+# 当月分ではない金額列（'前月末執行額' や予算額）は除く
+COL_EXCLUDE_TOTAL = ["前月", "累計", "予算"]
+# 小計行など突合の対象外にする勘定科目
+SKIP_ACCOUNTS = {"計", "合計", "小計"}
+# 表の途中に繰り返される見出し行（'勘　定　科　目 | 備考'）も対象外
+HEADER_ACCOUNTS = {_norm_space(c) for c in COL_CAND_ACCOUNT}
+# 金額の許容誤差（円）
+TOLERANCE = 0.5
+# True なら問題の無い行も出力する
+REPORT_ALL = False
+
+# 金額らしい数字（①－② のような計算式の丸数字は含めない）
+RE_DIGIT = re.compile(r"[0-9０-９]")
+
+def find_total_col(df: pd.DataFrame, cands: list[str] = COL_CAND_TOTAL,
+                   exclude: list[str] = COL_EXCLUDE_TOTAL) -> int | None:
+    """勘定科目ごとの当月金額列の位置を返す（見つからなければ None）"""
+    normed = [_norm_space(c) for c in df.columns]
+    for cand in cands:
+        cn = _norm_space(cand)
+        for i, name in enumerate(normed):
+            if cn in name and not any(x in name for x in exclude):
+                return i
+    return None
+
+def collect_sheet(path, sheet_name, registry: LayoutRegistry) -> pd.DataFrame:
+    """
+    1シート分の突合用の縦持ち表を返す。
+    列: period_end, sheet, account, remark_item, amount, src_row, n_item, total, n_total, n_unparsed
+      - 抽出品目の行   : amount=品目金額, src_row=抽出元の行位置, n_item=1
+      - 勘定科目の金額行: total=シート上の金額, n_total=1
+      - 未解析の備考行 : n_unparsed=1
+        （金額セルが空でないのに読めない、または金額列が無く/空で数字を含むのに品目が取れない行。
+          見出しの繰り返しや区分の見出し、金額の無いラベルだけの行は数えない）
+    """
+    df, col_account, _, roles = load_sheet_with_layout(
+        path, sheet_name, registry, COL_CAND_ACCOUNT, COL_CAND_REMARK
+    )
+    period_end = compute_period_end_from_book_and_sheet(str(path), sheet_name)
+
+    label_ser = df.iloc[:, roles.label_idx]
+    remark_spec = (df.iloc[:, [roles.label_idx, roles.amount_idx]]
+                   if roles.amount_idx is not None else label_ser)
+    items = build_long_records(df, col_account, remark_spec, with_source_row=True)
+
+    acc = df[col_account].ffill().astype(str).str.strip()
+    parts = [pd.DataFrame({
+        "account": items["account"],
+        "remark_item": items["remark_item"],
+        "amount": items["amount"],
+        "src_row": items["src_row"],
+        "n_item": 1,
+    })]
+
+    total_i = find_total_col(df)
+    if total_i is not None:
+        # 金額は勘定科目の先頭行にだけ入っている
+        totals = df.iloc[:, total_i].map(parse_amount_token)
+        has_total = totals.notna() & df[col_account].notna()
+        parts.append(pd.DataFrame({
+            "account": acc[has_total],
+            "total": totals[has_total].astype(float),
+            "n_total": 1,
+        }))
+
+    label_text = label_ser.map(lambda v: "" if pd.isna(v) else str(v).strip())
+    if roles.amount_idx is not None:
+        amount_ser = df.iloc[:, roles.amount_idx]
+        has_amount = amount_ser.notna() & amount_ser.astype(str).str.strip().ne("")
+    else:
+        has_amount = pd.Series(False, index=df.index)
+    suspicious = has_amount | label_text.map(lambda t: bool(RE_DIGIT.search(t)))
+    no_item = ~pd.Series(range(len(df)), index=df.index).isin(items["src_row"])
+    unparsed = label_text.ne("") & no_item & suspicious
+    parts.append(pd.DataFrame({"account": acc[unparsed], "n_unparsed": 1}))
+
+    out = pd.concat(parts, ignore_index=True)
+    out.insert(0, "period_end", pd.Timestamp(period_end).strftime("%Y-%m-%d"))
+    out.insert(1, "sheet", str(sheet_name))
+    return out
+
+def reconcile(frames: pd.DataFrame, tolerance: float = TOLERANCE) -> pd.DataFrame:
+    """
+    全シート分の縦持ち表を (period_end, account) で1回だけ集計し、突合結果を返す。
+    status: ok / mismatch / no_total / no_items
+    """
+    f = frames.copy()
+    for c in ("amount", "total"):
+        f[c] = f[c].fillna(0.0) if c in f.columns else 0.0
+    for c in ("n_item", "n_total", "n_unparsed"):
+        f[c] = f[c].fillna(0).astype(int) if c in f.columns else 0
+    # 同じ抽出元の行から同じ (品目, 金額) が2回以上出たものを重複取り込みとみなす
+    # （1つの備考セルから重なって抽出された、または同じ期のシート行を2回読んだ場合）。
+    # 別の行にある同じ品目・同じ金額は正当な明細なので数えない
+    if "src_row" in f.columns:
+        f["n_dup"] = (f["n_item"].eq(1) & f["src_row"].notna()
+                      & f.duplicated(subset=["period_end", "account", "src_row", "remark_item", "amount"])
+                      ).astype(int)
+    else:
+        f["n_dup"] = 0
+    acc_norm = f["account"].map(_norm_space)
+    f = f[~acc_norm.isin(SKIP_ACCOUNTS) & ~acc_norm.isin(HEADER_ACCOUNTS)]
+
+    g = f.groupby(["period_end", "account"], sort=True).agg(
+        sheet=("sheet", "first"),
+        item_sum=("amount", "sum"),
+        item_count=("n_item", "sum"),
+        account_total=("total", "sum"),
+        total_count=("n_total", "sum"),
+        unparsed_count=("n_unparsed", "sum"),
+        duplicate_count=("n_dup", "sum"),
+    ).reset_index()
+
+    g.loc[g["total_count"] == 0, "account_total"] = float("nan")
+    g["diff"] = g["item_sum"] - g["account_total"]
+    g["status"] = "ok"
+    g.loc[g["item_count"] == 0, "status"] = "no_items"
+    g.loc[g["total_count"] == 0, "status"] = "no_total"
+    g.loc[(g["status"] == "ok") & (g["diff"].abs() > tolerance), "status"] = "mismatch"
+
+    # 金額も品目も無い見出し行（◇精算金内訳 など）は落とす
+    g = g[(g["item_count"] > 0) | (g["account_total"].fillna(0) != 0)]
+    return g.drop(columns=["total_count"]).reset_index(drop=True)
+
+def main():
+    registry = LayoutRegistry(LAYOUT_FILE)
+    frames = []
+    for path in EXCEL_PATHS:
+        for sheet_name in pd.ExcelFile(path).sheet_names:
+            try:
+                frames.append(collect_sheet(path, sheet_name, registry))
+            except ValueError as e:
+                print(f"[WARN] {path} / {sheet_name} をスキップ: {str(e).splitlines()[0]}")
+    registry.save()
+    if not frames:
+        raise RuntimeError("突合できるシートがありませんでした。")
+
+    result = reconcile(pd.concat(frames, ignore_index=True))
+    # 合計が合っている科目は、未解析の備考セルや重複取り込みがあっても要確認に含めない
+    # （備考が空で品目が無いだけの ①純売上高 などの集計行も同様）。
+    # 重複取り込みは mismatch の行の duplicate_count で原因の手がかりとして見る
+    issues = result[result["status"].isin(["mismatch", "no_total"])
+                    | ((result["status"] == "no_items") & (result["unparsed_count"] > 0))]
+    (result if REPORT_ALL else issues).to_csv(OUT_CSV, index=False, encoding="utf-8-sig")
+
+    print(f"[OK] {OUT_CSV} を出力しました。対象 {len(result)} 件 / 要確認 {len(issues)} 件")
+    print("  status:", result["status"].value_counts().to_dict())
+    print(f"  未解析の備考セル={int(result['unparsed_count'].sum())} / 重複取り込み={int(result['duplicate_count'].sum())}")
+
+if __name__ == "__main__":
+    main()
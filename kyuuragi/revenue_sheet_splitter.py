@@ -1,17 +1,9 @@
-from openpyxl import load_workbook, Workbook
 import re
 
 src = "６年・５年度売上比較_新_renamed.xlsx"
 
-wb = load_workbook(src, data_only=True)
-
-# 出力ブック
-wb_keep_abe_fh = Workbook()
-wb_keep_cdgi_prev = Workbook()
-
-# 既定の最初の空シートを削除
-wb_keep_abe_fh.remove(wb_keep_abe_fh.active)
-wb_keep_cdgi_prev.remove(wb_keep_cdgi_prev.active)
+out1 = "６年・５年度売上比較_新_ABEFH.xlsx"
+out2 = "６年・５年度売上比較_新_CDGI_prevyear.xlsx"
 
 # ヘルパー：全角→半角
 def to_halfwidth_num(s: str) -> str:
@@ -40,53 +32,67 @@ def col_idx(letter: str) -> int:
 cols_left_1 = ['A','B','E','F','H']
 cols_left_2 = ['C','D','G','I']
 
-for ws in wb.worksheets:
-    # --- 1) A,B,E,F,H を残す ---
-    new_ws1 = wb_keep_abe_fh.create_sheet(title=ws.title)
-    # 書き込み
-    for r in ws.iter_rows(min_row=1, max_row=ws.max_row):
-        new_row = []
-        for col_letter in cols_left_1:
-            ci = col_idx(col_letter)
-            if ci <= ws.max_column:
-                new_row.append(r[ci-1].value)
+def main():
+    from openpyxl import load_workbook, Workbook  # 実行時だけ読み込む
+
+    wb = load_workbook(src, data_only=True)
+
+    # 出力ブック
+    wb_keep_abe_fh = Workbook()
+    wb_keep_cdgi_prev = Workbook()
+
+    # 既定の最初の空シートを削除
+    wb_keep_abe_fh.remove(wb_keep_abe_fh.active)
+    wb_keep_cdgi_prev.remove(wb_keep_cdgi_prev.active)
+
+    for ws in wb.worksheets:
+        # --- 1) A,B,E,F,H を残す ---
+        new_ws1 = wb_keep_abe_fh.create_sheet(title=ws.title)
+        # 書き込み
+        for r in ws.iter_rows(min_row=1, max_row=ws.max_row):
+            new_row = []
+            for col_letter in cols_left_1:
+                ci = col_idx(col_letter)
+                if ci <= ws.max_column:
+                    new_row.append(r[ci-1].value)
+                else:
+                    new_row.append(None)
+            new_ws1.append(new_row)
+        
+        # --- 2) C,D,G,I を残す（シート名は1年前の西暦へ） ---
+        year, month = parse_year_month(ws.title)
+        if year is not None:
+            prev_year = year - 1
+            if month is not None:
+                new_title = f"{prev_year}-{month:02d}"
             else:
-                new_row.append(None)
-        new_ws1.append(new_row)
-    
-    # --- 2) C,D,G,I を残す（シート名は1年前の西暦へ） ---
-    year, month = parse_year_month(ws.title)
-    if year is not None:
-        prev_year = year - 1
-        if month is not None:
-            new_title = f"{prev_year}-{month:02d}"
+                new_title = f"{prev_year}"
         else:
-            new_title = f"{prev_year}"
-    else:
-        # パースできない場合は元名 + "_prev" にフォールバック
-        new_title = ws.title + "_prev"
-    
-    # シート名重複回避
-    base_title = new_title
-    suffix = 1
-    while new_title in wb_keep_cdgi_prev.sheetnames:
-        new_title = f"{base_title}_{suffix}"
-        suffix += 1
-    
-    new_ws2 = wb_keep_cdgi_prev.create_sheet(title=new_title)
-    for r in ws.iter_rows(min_row=1, max_row=ws.max_row):
-        new_row = []
-        for col_letter in cols_left_2:
-            ci = col_idx(col_letter)
-            if ci <= ws.max_column:
-                new_row.append(r[ci-1].value)
-            else:
-                new_row.append(None)
-        new_ws2.append(new_row)
+            # パースできない場合は元名 + "_prev" にフォールバック
+            new_title = ws.title + "_prev"
+        
+        # シート名重複回避
+        base_title = new_title
+        suffix = 1
+        while new_title in wb_keep_cdgi_prev.sheetnames:
+            new_title = f"{base_title}_{suffix}"
+            suffix += 1
+        
+        new_ws2 = wb_keep_cdgi_prev.create_sheet(title=new_title)
+        for r in ws.iter_rows(min_row=1, max_row=ws.max_row):
+            new_row = []
+            for col_letter in cols_left_2:
+                ci = col_idx(col_letter)
+                if ci <= ws.max_column:
+                    new_row.append(r[ci-1].value)
+                else:
+                    new_row.append(None)
+            new_ws2.append(new_row)
 
-out1 = "６年・５年度売上比較_新_ABEFH.xlsx"
-out2 = "６年・５年度売上比較_新_CDGI_prevyear.xlsx"
-wb_keep_abe_fh.save(out1)
-wb_keep_cdgi_prev.save(out2)
+    wb_keep_abe_fh.save(out1)
+    wb_keep_cdgi_prev.save(out2)
+    print(f"[OK] {out1} / {out2} を出力しました。")
+    return out1, out2
 
-(out1, out2)
+if __name__ == "__main__":
+    main()
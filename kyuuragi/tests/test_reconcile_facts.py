@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+
+from kyuuragi.reconcile_facts import reconcile
+
+def _frame(rows):
+    cols = ["period_end", "sheet", "account", "remark_item", "amount", "n_item", "total", "n_total", "n_unparsed"]
+    return pd.DataFrame(rows, columns=cols)
+
+def test_reconcile_status_and_header_echo():
+    nan = float("nan")
+    frames = _frame([
+        ("2023-04-30", "2023-04", "消耗品費", "紙コップ", 100.0, 1, nan, nan, nan),
+        ("2023-04-30", "2023-04", "消耗品費", "洗剤", 50.0, 1, nan, nan, nan),
+        ("2023-04-30", "2023-04", "消耗品費", nan, nan, nan, 150.0, 1, nan),
+        ("2023-04-30", "2023-04", "消耗品費", nan, nan, nan, nan, nan, 1),
+        ("2023-04-30", "2023-04", "修繕費", "網戸", 300.0, 1, nan, nan, nan),
+        ("2023-04-30", "2023-04", "修繕費", nan, nan, nan, 330.0, 1, nan),
+        ("2023-04-30", "2023-04", "旅費", nan, nan, nan, 80.0, 1, nan),
+        # 表の途中で繰り返される見出し行
+        ("2023-04-30", "2023-04", "勘　定　科　目", nan, nan, nan, nan, nan, 1),
+        ("2023-04-30", "2023-04", "合計", nan, nan, nan, 560.0, 1, nan),
+    ])
+    result = reconcile(frames).set_index("account")
+    assert set(result.index) == {"消耗品費", "修繕費", "旅費"}
+    assert result.loc["消耗品費", "status"] == "ok"
+    assert result.loc["消耗品費", "unparsed_count"] == 1
+    assert result.loc["修繕費", "status"] == "mismatch"
+    assert result.loc["修繕費", "diff"] == -30.0
+    assert result.loc["旅費", "status"] == "no_items"
+
+def _item_frame(rows):
+    cols = ["period_end", "sheet", "account", "remark_item", "amount", "src_row", "n_item", "total", "n_total"]
+    return pd.DataFrame(rows, columns=cols)
+
+def test_repeated_item_on_separate_rows_is_not_duplicate():
+    nan = float("nan")
+    frames = _item_frame([
+        # 同じ品目・同じ金額が別々の行に3件（正当な明細）
+        ("2023-04-30", "2023-04", "通信費", "切手", 2000.0, 3, 1, nan, nan),
+        ("2023-04-30", "2023-04", "通信費", "切手", 2000.0, 4, 1, nan, nan),
+        ("2023-04-30", "2023-04", "通信費", "切手", 2000.0, 5, 1, nan, nan),
+        ("2023-04-30", "2023-04", "通信費", nan, nan, nan, nan, 6000.0, 1),
+    ])
+    result = reconcile(frames).set_index("account")
+    assert result.loc["通信費", "status"] == "ok"
+    assert result.loc["通信費", "duplicate_count"] == 0
+
+def test_same_source_row_read_twice_is_duplicate():
+    nan = float("nan")
+    frames = _item_frame([
+        # 1つの備考セルから同じ品目が重なって抽出された
+        ("2023-04-30", "2023-04", "消耗品費", "洗剤", 500.0, 7, 1, nan, nan),
+        ("2023-04-30", "2023-04", "消耗品費", "洗剤", 500.0, 7, 1, nan, nan),
+        ("2023-04-30", "2023-04", "消耗品費", nan, nan, nan, nan, 500.0, 1),
+        # 同じ期のシートを2回読んだ（シート名違いのコピー）
+        ("2023-05-31", "2023-05", "旅費", "電車賃", 800.0, 2, 1, nan, nan),
+        ("2023-05-31", "2023-05", "旅費", nan, nan, nan, nan, 800.0, 1),
+        ("2023-05-31", "2023-05 (2)", "旅費", "電車賃", 800.0, 2, 1, nan, nan),
+        ("2023-05-31", "2023-05 (2)", "旅費", nan, nan, nan, nan, 800.0, 1),
+    ])
+    result = reconcile(frames).set_index("account")
+    assert result.loc["消耗品費", "duplicate_count"] == 1
+    assert result.loc["消耗品費", "status"] == "mismatch"
+    assert result.loc["旅費", "duplicate_count"] == 1
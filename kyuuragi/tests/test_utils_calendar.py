@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+from datetime import date
+
+import pandas as pd
+
+from kyuuragi.utils_calendar import (
+    DATE_KEY_COL,
+    attach_date_key,
+    build_calendar,
+    clamp_day,
+    fiscal_columns,
+    month_attrs,
+    month_end,
+    parse_date_clamped,
+    to_date_key,
+    year_of_fiscal_month,
+)
+
+def test_date_key_stays_integer_with_missing_dates():
+    df = pd.DataFrame({"日付": ["2024-04-30", None, "2024-13-01"]}, index=[10, 11, 12])
+    out = attach_date_key(df)
+    assert str(out[DATE_KEY_COL].dtype) == "Int64"
+    assert out[DATE_KEY_COL].tolist() == [20240430, pd.NA, pd.NA]
+    assert out.to_csv(index=False).splitlines()[1] == "2024-04-30,20240430"
+
+def test_to_date_key_keeps_series_index():
+    ser = pd.Series(pd.to_datetime(["2025-03-31", "2025-04-01"]), index=["a", "b"])
+    assert to_date_key(ser).to_dict() == {"a": 20250331, "b": 20250401}
+
+def test_fiscal_columns_start_in_april():
+    fc = fiscal_columns(pd.Series(["2025-03-31", "2025-04-01"]))
+    assert fc["会計年度"].tolist() == [2024, 2025]
+    assert fc["会計月"].tolist() == [12, 1]
+    assert fc["四半期"].tolist() == [4, 1]
+
+def test_fiscal_columns_match_calendar():
+    cal = build_calendar("2023-01-01", "2024-12-31", with_holidays=False)
+    fc = fiscal_columns(cal["日付"])
+    assert fc.reset_index(drop=True).equals(cal[["会計年度", "会計月", "四半期"]].astype("Int64"))
+
+def test_month_helpers_come_from_calendar():
+    assert month_end(2024, 2) == date(2024, 2, 29)
+    assert clamp_day(2023, 2, 30) == date(2023, 2, 28)
+    assert clamp_day(2023, 4, 0) == date(2023, 4, 1)
+    assert year_of_fiscal_month(2023, 3) == 2024
+    assert year_of_fiscal_month(2023, 4) == 2023
+    assert month_attrs(2025, 3)["令和年度"] == 6
+
+def test_parse_date_clamped_rounds_to_month_end():
+    assert parse_date_clamped("2023-02-30") == pd.Timestamp("2023-02-28")
+    assert parse_date_clamped("2024/2/31") == pd.Timestamp("2024-02-29")
+    assert parse_date_clamped("2023-13-01") is pd.NaT
+    assert parse_date_clamped(None) is pd.NaT
+    keys = to_date_key(pd.Series(["2023-02-30", None]).map(parse_date_clamped))
+    assert str(keys.dtype) == "Int64" and keys.tolist() == [20230228, pd.NA]
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+
+from kyuuragi.utils_delta import OP_COL, SEQ_COL, compute_delta, pending_deltas, write_delta
+
+def _facts(rows):
+    df = pd.DataFrame(rows, columns=["日付", "勘定科目", "品目", "金額", "日付キー"])
+    df["日付"] = pd.to_datetime(df["日付"])
+    return df
+
+def _snap(df):
+    return compute_delta(None, df)[1].astype(str)
+
+def test_delete_keeps_integer_columns(tmp_path):
+    prev = _facts([
+        ("2024-04-30", "A", "x", 100.0, 20240430),
+        ("2024-04-30", "A", "y", 200.0, 20240430),
+    ])
+    cur = prev.iloc[:1].copy()
+    cur.loc[0, "金額"] = 150.0
+    for key_dtype in ("int64", "Int64"):
+        cur["日付キー"] = cur["日付キー"].astype(key_dtype)
+        out_csv = tmp_path / f"facts_{key_dtype}.csv"
+        write_delta(prev, out_csv, run_id="1")
+        assert write_delta(cur, out_csv, run_id="2") == {"I": 0, "U": 1, "D": 1}
+
+        text = (tmp_path / f"facts_{key_dtype}_delta_2.csv").read_text(encoding="utf-8-sig")
+        assert "20240430.0" not in text
+        assert "U,2024-04-30,A,x,0,150.0,20240430" in text.splitlines()[1:]
+
+def test_same_key_siblings_keep_their_ordinals():
+    prev = _facts([
+        ("2024-04-30", "A", "x", 100.0, 20240430),
+        ("2024-04-30", "A", "x", 300.0, 20240430),
+        ("2024-04-30", "A", "x", 500.0, 20240430),
+    ])
+    prev_snap = _snap(prev)
+    seq_of = dict(zip(prev["金額"], compute_delta(None, prev)[1][SEQ_COL]))
+
+    # 1行削除 → D だけ
+    delta, _ = compute_delta(prev_snap, prev.iloc[[0, 2]])
+    assert delta[OP_COL].tolist() == ["D"]
+    assert delta[SEQ_COL].tolist() == [seq_of[300.0]]
+
+    # 1行追加 → I だけ（連番は空いている次の番号）
+    added = pd.concat([prev, _facts([("2024-04-30", "A", "x", 50.0, 20240430)])], ignore_index=True)
+    delta, snap = compute_delta(prev_snap, added)
+    assert delta[OP_COL].tolist() == ["I"]
+    assert delta[SEQ_COL].tolist() == [3]
+    assert snap[SEQ_COL].tolist()[:3] == prev_snap[SEQ_COL].astype(int).tolist()
+
+    # 1行修正 → その行の U だけ
+    amended = prev.copy()
+    amended.loc[1, "金額"] = 350.0
+    delta, snap = compute_delta(prev_snap, amended)
+    assert delta[OP_COL].tolist() == ["U"]
+    assert delta["金額"].tolist() == [350.0]
+    assert delta[SEQ_COL].tolist() == [seq_of[300.0]]
+
+def test_delta_files_are_versioned_per_run(tmp_path, capsys):
+    out_csv = tmp_path / "facts.csv"
+    base = _facts([("2024-04-30", "A", "x", 100.0, 20240430)])
+    write_delta(base, out_csv, run_id="20240501-000000")
+    write_delta(_facts([("2024-04-30", "A", "x", 200.0, 20240430)]), out_csv, run_id="20240502-000000")
+    # 変化なしなら差分ファイルは増えない
+    write_delta(_facts([("2024-04-30", "A", "x", 200.0, 20240430)]), out_csv, run_id="20240503-000000")
+
+    names = [p.name for p in pending_deltas(out_csv)]
+    assert names == ["facts_delta_20240501-000000.csv", "facts_delta_20240502-000000.csv"]
+    assert "未適用の差分ファイルが 2 件" in capsys.readouterr().out
+
+    # 同じ実行 ID でも上書きしない
+    write_delta(base, out_csv, run_id="20240502-000000")
+    assert (tmp_path / "facts_delta_20240502-000000-2.csv").exists()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+
+from kyuuragi.utils_item_canon import (
+    ItemCanonicalizer,
+    canonicalize_items,
+    differs_only_by_filler,
+    normalize_item,
+    split_qualifiers,
+)
+
+def test_split_qualifiers_brackets_dots_and_alnum():
+    assert split_qualifiers(normalize_item("ホットショーケース（残金）代")) == ("ホットショーケース代", ("残金",))
+    assert split_qualifiers(normalize_item("電気料金・・・電力")) == ("電気料金", ("電力",))
+    assert split_qualifiers(normalize_item("JA会議室使用料")) == ("ja会議室使用料", ("ja",))
+    # 括弧でも '・・・' でも同じ限定語
+    assert (split_qualifiers(normalize_item("うまかっちゃんほか（ミゾカミ）"))
+            == split_qualifiers(normalize_item("うまかっちゃんほか・・・ミゾカミ")))
+
+def test_differs_only_by_filler():
+    assert differs_only_by_filler("バーコードラベル", "バーコードラベル代")
+    assert differs_only_by_filler("感謝祭協力者昼食代", "感謝祭時協力者昼食代")
+    assert differs_only_by_filler("生活習慣病予防健診料", "生活習慣病予防健診代")
+    assert not differs_only_by_filler("佐賀たまねぎポテトチップほか", "たまねぎポテトチップほか")
+    assert not differs_only_by_filler("蒸したまご用袋代", "温泉蒸したまご用袋代")
+    assert not differs_only_by_filler("エフエム佐賀cmスポット電波料", "エフエム佐賀cmスポット電波・制作料")
+
+def test_items_are_not_merged_across_accounts():
+    items = pd.Series(["従業員給与（１名）", "従業員給与（１名）", "役員給与（１名）",
+                       "従業員賞与（１名）", "役員賞与（１名）"])
+    accounts = pd.Series(["給料手当（6212）", "給料手当（6212）", "役員報酬（6211）",
+                          "給料手当（6212）", "役員報酬（6211）"])
+    out, _ = canonicalize_items(items, accounts=accounts)
+    assert out.tolist() == items.tolist()
+
+def test_same_account_similar_but_different_items_stay_apart():
+    canon = ItemCanonicalizer()
+    acc = "備品・消耗品費（6225）"
+    pairs = [
+        ("ホットショーケース（頭金）代", "ホットショーケース（残金）代"),
+        ("JA会議室使用料", "会議室使用料"),
+        ("役員給与（１名）", "従業員給与（１名）"),
+        ("令和５年度唐津観光協会会費", "令和４年度唐津観光協会会費"),
+        ("電気料金・・・電灯", "電気料金・・・電力"),
+        # 前・途中に語が足されただけのもの（かな・漢字の限定語）
+        ("たまねぎポテトチップほか", "佐賀たまねぎポテトチップほか"),
+        ("温泉蒸したまご用袋代", "蒸したまご用袋代"),
+        ("エフエム佐賀CMスポット電波・制作料", "エフエム佐賀CMスポット電波料"),
+    ]
+    for first, second in pairs:
+        assert canon.canonicalize(first, acc) == first
+        assert canon.canonicalize(second, acc) == second
+
+def test_variants_still_merge_within_account():
+    canon = ItemCanonicalizer()
+    acc = "仕入高（5211）"
+    assert canon.canonicalize("ソフトクリーム用スプーン", acc) == "ソフトクリーム用スプーン"
+    assert canon.canonicalize("ソフトクリーム用スプーン他", acc) == "ソフトクリーム用スプーン"
+    assert canon.canonicalize("トイレットペーパー代・・・4月15日", acc) == "トイレットペーパー代"
+    assert canon.canonicalize("トイレットペーパー代・・・5月2日", acc) == "トイレットペーパー代"
+    # 対応表のキーは (勘定科目, 元の表記)
+    assert canon.mapping[("仕入高(5211)", "ソフトクリーム用スプーン他")][2] == "ngram"
+
+def test_mapping_round_trip_is_keyed_by_account(tmp_path):
+    path = tmp_path / "map.csv"
+    items = pd.Series(["役員給与（１名）", "従業員給与（１名）"])
+    accounts = pd.Series(["役員報酬（6211）", "給料手当（6212）"])
+    canonicalize_items(items, mapping_path=path, accounts=accounts)
+
+    saved = pd.read_csv(path, encoding="utf-8-sig")
+    assert list(saved.columns[:2]) == ["account", "raw_item"]
+
+    out, _ = canonicalize_items(items, mapping_path=path, accounts=accounts)
+    assert out.tolist() == items.tolist()
+
+def test_old_format_mapping_is_ignored(tmp_path):
+    path = tmp_path / "map.csv"
+    pd.DataFrame({
+        "raw_item": ["役員給与（１名）"],
+        "canonical_item": ["従業員給与（１名）"],
+        "similarity": [0.8],
+        "method": ["ngram"],
+    }).to_csv(path, index=False, encoding="utf-8-sig")
+    out, _ = canonicalize_items(pd.Series(["役員給与（１名）"]), mapping_path=path,
+                                accounts=pd.Series(["役員報酬（6211）"]))
+    assert out.tolist() == ["役員給与（１名）"]
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+
+from kyuuragi.build_facts_long import COL_CAND_ACCOUNT, COL_CAND_REMARK, load_sheet_with_layout
+from kyuuragi.utils_layout import FINGERPRINT_ROWS, LayoutRegistry, fingerprint_sheet
+
+def _raw(month: int, remark_header: str = "備考", pad_rows: int = 2,
+         account_header: str = "節") -> pd.DataFrame:
+    """上部の帯 pad_rows 行 + 見出し行 + 明細2行（header=None で読んだ形）"""
+    rows = [[f"令和5年{month}月 月別収支状況", None, None, None]]
+    rows += [[None, None, None, None]] * (pad_rows - 1)
+    rows += [[account_header, f"{month}月執行額", remark_header, remark_header]]
+    rows += [["消耗品費（6225）", 1500 + month, "紙コップ", 1000 + month],
+             [None, None, "洗剤", 500]]
+    return pd.DataFrame(rows)
+
+def test_fingerprint_ignores_month_digits():
+    assert fingerprint_sheet(_raw(4)) == fingerprint_sheet(_raw(5))
+    assert fingerprint_sheet(_raw(4)) != fingerprint_sheet(_raw(4, remark_header="摘要"))
+
+def test_lookup_hit_and_round_trip(tmp_path):
+    path = tmp_path / "layout.json"
+    reg = LayoutRegistry(path)
+    raw = _raw(4)
+    fp, layout = reg.lookup(raw)
+    assert layout is None and reg.misses == 1
+    reg.register(fp, raw, 2, account_col=0, remark_col=2, label_col=2, amount_col=3)
+    reg.save()
+
+    reloaded = LayoutRegistry(path)
+    fp5, layout5 = reloaded.lookup(_raw(5))
+    assert fp5 == fp and reloaded.hits == 1
+    assert layout5 == {"header_row": 2, "header_sig": layout5["header_sig"],
+                       "account_col": 0, "remark_col": 2, "label_col": 2, "amount_col": 3}
+
+def test_hit_rejected_when_header_row_differs(tmp_path):
+    # 見出し行が指紋の範囲より下にあると、指紋は同じでも見出しの中身は違いうる
+    pad = FINGERPRINT_ROWS + 1
+    reg = LayoutRegistry(tmp_path / "layout.json")
+    raw = _raw(4, pad_rows=pad)
+    fp, _ = reg.lookup(raw)
+    reg.register(fp, raw, pad, account_col=0, remark_col=2, label_col=2, amount_col=3)
+
+    changed = _raw(4, remark_header="摘要", pad_rows=pad)
+    fp2, layout = reg.lookup(changed)
+    assert fp2 == fp
+    assert layout is None and reg.misses == 2
+
+    # 見出し行の位置がずれた場合も不一致
+    shifted = pd.concat([raw.iloc[:pad], pd.DataFrame([[None] * 4]), raw.iloc[pad:]], ignore_index=True)
+    assert reg.lookup(shifted)[1] is None
+
+def test_load_sheet_with_layout_uses_cached_positions(tmp_path):
+    book = tmp_path / "book.xlsx"
+    with pd.ExcelWriter(book, engine="openpyxl") as xw:
+        _raw(4).to_excel(xw, sheet_name="2023-04", header=False, index=False)
+        _raw(5).to_excel(xw, sheet_name="2023-05", header=False, index=False)
+        _raw(6, account_header="勘定科目").to_excel(xw, sheet_name="2023-06", header=False, index=False)
+
+    reg = LayoutRegistry(tmp_path / "layout.json")
+    first = load_sheet_with_layout(book, "2023-04", reg, COL_CAND_ACCOUNT, COL_CAND_REMARK)
+    second = load_sheet_with_layout(book, "2023-05", reg, COL_CAND_ACCOUNT, COL_CAND_REMARK)
+    third = load_sheet_with_layout(book, "2023-06", reg, COL_CAND_ACCOUNT, COL_CAND_REMARK)
+
+    assert first[3].method != "cached" and second[3].method == "cached"
+    assert third[3].method != "cached"
+    assert (reg.hits, reg.misses) == (1, 2)
+    assert [r[1] for r in (first, second, third)] == ["節", "節", "勘定科目"]
+    for df, col_account, col_remark, roles in (first, second, third):
+        assert (roles.label_idx, roles.amount_idx) == (2, 3)
+    assert second[0].iloc[0, 3] == 1005
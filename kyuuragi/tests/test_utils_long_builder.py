@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+
+from kyuuragi.utils_long_builder import build_long_records, infer_remark_roles
+
+def _remarks(labels, amounts):
+    df = pd.DataFrame({"勘定科目": ["消耗品費"] * len(labels), "a": labels, "b": amounts})
+    df.columns = ["勘定科目", "備考", "備考"]
+    return df
+
+def test_single_remark_column():
+    df = pd.DataFrame({"勘定科目": ["消耗品費"], "備考": ["紙コップ 1,000円"]})
+    roles = infer_remark_roles(df, "備考")
+    assert (roles.label_idx, roles.amount_idx, roles.method) == (1, None, "single")
+
+def test_small_columns_are_scanned_in_full():
+    df = _remarks(["紙コップ", "洗剤", "ゴミ袋"], ["1,000", "500", "300"])
+    roles = infer_remark_roles(df, "備考", sample_size=64)
+    assert (roles.label_idx, roles.amount_idx, roles.method) == (1, 2, "full")
+    assert roles.confidence == 1.0
+
+def test_clear_sample_decides_roles():
+    n = 300
+    df = _remarks([f"品目{k}" for k in range(n)], [str(100 + k) for k in range(n)])
+    roles = infer_remark_roles(df, "備考", sample_size=32)
+    assert (roles.label_idx, roles.amount_idx, roles.method) == (1, 2, "sample")
+    assert roles.confidence == 1.0
+
+def test_ambiguous_sample_falls_back_to_full_scan():
+    n = 200
+    # 金額列の半分が文字（'別紙' など）→ 標本の confidence が低い
+    amounts = ["別紙" if k % 2 else str(100 + k) for k in range(n)]
+    df = _remarks([f"品目{k}" for k in range(n)], amounts)
+    roles = infer_remark_roles(df, "備考", sample_size=32, min_confidence=0.8)
+    assert roles.method == "sample→full"
+    assert (roles.label_idx, roles.amount_idx) == (1, 2)
+    assert 0.4 < roles.confidence < 0.6
+
+def test_build_long_records_pairs_label_and_amount_columns():
+    df = _remarks(["紙コップ", "洗剤", None], ["1,000", "500", None])
+    out = build_long_records(df, "勘定科目", df.iloc[:, [1, 2]], with_source_row=True)
+    assert out[["remark_item", "amount", "src_row"]].values.tolist() == [["紙コップ", 1000.0, 0], ["洗剤", 500.0, 1]]
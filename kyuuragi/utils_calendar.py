@@ -0,0 +1,147 @@
+# utils_calendar.py
+"""
+日付ディメンション（カレンダー表）を一度だけ作り、各表は整数の日付キー
+（YYYYMMDD）で結合するためのユーティリティ。
+
+月末・会計年度（4月始まり）・令和年・曜日・祝日フラグをここで一括計算するので、
+各スクリプトで calendar.monthrange / jpholiday / 文字列日付の比較を繰り返さなくてよい。
+
+年度・月末の規則は build_calendar にだけ書き、fiscal_columns / month_attrs / month_end /
+clamp_day / year_of_fiscal_month はすべてカレンダー表から値を引く。
+"""
+from __future__ import annotations
+from datetime import date, timedelta
+from functools import lru_cache
+import re
+import pandas as pd
+
+FISCAL_START_MONTH = 4
+REIWA_OFFSET = 2018  # 令和1年=2019年
+WEEKDAY_JA = ["月", "火", "水", "木", "金", "土", "日"]
+DATE_KEY_COL = "日付キー"
+FISCAL_COLS = ["会計年度", "会計月", "四半期"]
+HOLIDAY_COLS = ["祝祭日前日", "祝祭日", "振替休日"]
+
+RE_YMD = re.compile(r"^\s*(\d{4})[-/](\d{1,2})[-/](\d{1,2})\s*$")
+
+def to_date_key(values) -> pd.Series:
+    """
+    日付（文字列/Timestamp/date）の Series を YYYYMMDD の整数キーに変換する（変換不可は <NA>）。
+    Series を渡したときは index をそのまま引き継ぐ。
+    """
+    dt = pd.to_datetime(pd.Series(values), errors="coerce")
+    key = dt.dt.year * 10000 + dt.dt.month * 100 + dt.dt.day
+    return key.astype("Int64")
+
+def attach_date_key(df: pd.DataFrame, date_col: str = "日付", key_col: str = DATE_KEY_COL) -> pd.DataFrame:
+    """df に整数日付キー列を付けて返す（元の df は変更しない）"""
+    out = df.copy()
+    # to_numpy() すると欠損を含むときに float64 になるので、Int64 の Series のまま代入する
+    out[key_col] = to_date_key(out[date_col])
+    return out
+
+def _holiday_names(start: date, end: date) -> dict[date, str]:
+    import jpholiday  # 祝日フラグが要るときだけ読み込む
+    return {d: name for d, name in jpholiday.between(start, end)}
+
+def build_calendar(start, end, with_holidays: bool = True) -> pd.DataFrame:
+    """
+    start〜end（両端含む）の全日付を1行ずつ持つカレンダー表を返す。
+
+    列: 日付キー, 日付, 年, 月, 日, 月末日, 月末日キー, 月末フラグ,
+        会計年度, 会計月, 四半期, 令和年度, 曜日番号, 曜, 土日,
+        祝祭日, 振替休日, 祝祭日前日（with_holidays=True のとき）
+    """
+    dates = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), freq="D")
+    cal = pd.DataFrame({"日付": dates})
+    cal[DATE_KEY_COL] = (dates.year * 10000 + dates.month * 100 + dates.day).astype("int64")
+    cal["年"] = dates.year
+    cal["月"] = dates.month
+    cal["日"] = dates.day
+
+    ends = dates + pd.offsets.MonthEnd(0)
+    cal["月末日"] = ends
+    cal["月末日キー"] = (ends.year * 10000 + ends.month * 100 + ends.day).astype("int64")
+    cal["月末フラグ"] = (dates == ends).astype(int)
+
+    fiscal_year = dates.year.where(dates.month >= FISCAL_START_MONTH, dates.year - 1)
+    cal["会計年度"] = fiscal_year
+    cal["会計月"] = (dates.month - FISCAL_START_MONTH) % 12 + 1
+    cal["四半期"] = (cal["会計月"] - 1) // 3 + 1
+    cal["令和年度"] = fiscal_year - REIWA_OFFSET
+
+    cal["曜日番号"] = dates.weekday
+    cal["曜"] = [WEEKDAY_JA[w] for w in dates.weekday]
+    cal["土日"] = (dates.weekday >= 5).astype(int)
+
+    if with_holidays and len(dates):
+        # 翌日判定のため終端を1日延ばして一括取得
+        names = _holiday_names(dates[0].date(), dates[-1].date() + timedelta(days=1))
+        day_list = [d.date() for d in dates]
+        cal["振替休日"] = [int("振替" in names.get(d, "")) for d in day_list]
+        cal["祝祭日"] = [int(d in names and "振替" not in names[d]) for d in day_list]
+        cal["祝祭日前日"] = [int((d + timedelta(days=1)) in names) for d in day_list]
+
+    cal["日付"] = cal["日付"].dt.date
+    cal["月末日"] = cal["月末日"].dt.date
+    return cal
+
+def calendar_for(keys: pd.Series, with_holidays: bool = True) -> pd.DataFrame:
+    """日付キーの Series が含む範囲をすべて覆うカレンダー表を返す"""
+    k = pd.Series(keys).dropna().astype("int64")
+    if k.empty:
+        raise ValueError("日付キーが1件もありません。")
+    start = pd.to_datetime(str(k.min()), format="%Y%m%d")
+    end = pd.to_datetime(str(k.max()), format="%Y%m%d")
+    return build_calendar(start, end, with_holidays=with_holidays)
+
+# ---- カレンダー表から引く補助関数 ----
+def fiscal_columns(dates: pd.Series) -> pd.DataFrame:
+    """日付の Series に対応する 会計年度 / 会計月 / 四半期（4-6月=1）をカレンダー表から引く"""
+    keys = to_date_key(dates)
+    out = pd.DataFrame(index=dates.index, columns=FISCAL_COLS)
+    if keys.notna().any():
+        cal = calendar_for(keys, with_holidays=False).set_index(DATE_KEY_COL)[FISCAL_COLS]
+        out = cal.reindex(keys.astype("Int64").to_numpy())
+        out.index = dates.index
+    return out.astype("Int64")
+
+@lru_cache(maxsize=None)
+def month_attrs(year: int, month: int) -> dict:
+    """その月の 月末日 / 会計年度 / 会計月 / 四半期 / 令和年度 をカレンダー表の月初行から返す"""
+    row = build_calendar(date(year, month, 1), date(year, month, 1), with_holidays=False).iloc[0]
+    return {
+        "月末日": row["月末日"],
+        "会計年度": int(row["会計年度"]),
+        "会計月": int(row["会計月"]),
+        "四半期": int(row["四半期"]),
+        "令和年度": int(row["令和年度"]),
+    }
+
+def month_end(year: int, month: int) -> date:
+    return month_attrs(year, month)["月末日"]
+
+def clamp_day(year: int, month: int, day: int) -> date:
+    """存在しない日（2023-02-30 など）をその月の 1日〜月末日 に丸める"""
+    last = month_end(year, month)
+    return last.replace(day=min(max(day, 1), last.day))
+
+def year_of_fiscal_month(fiscal_year: int, month: int) -> int:
+    """会計年度 fiscal_year に属する month 月の西暦年（4月始まりなら 1〜3月は翌年）"""
+    for year in (fiscal_year, fiscal_year + 1):
+        if month_attrs(year, month)["会計年度"] == fiscal_year:
+            return year
+    raise ValueError(f"会計年度 {fiscal_year} に {month} 月がありません。")
+
+def parse_date_clamped(value) -> pd.Timestamp:
+    """
+    'YYYY-MM-DD' / 'YYYY/MM/DD' の存在しない日（2022-02-30 など）をその月の末日に丸めて読む。
+    それ以外の書式は pd.to_datetime に任せる（読めなければ NaT）。
+    """
+    if value is None or (isinstance(value, float) and pd.isna(value)) or value is pd.NaT:
+        return pd.NaT
+    s = str(value).strip()
+    m = RE_YMD.match(s)
+    if not m or not (1 <= int(m.group(2)) <= 12):
+        return pd.to_datetime(s, errors="coerce")
+    return pd.Timestamp(clamp_day(int(m.group(1)), int(m.group(2)), int(m.group(3))))
@@ -0,0 +1,184 @@
+# utils_delta.py
+"""
+前回実行時のスナップショットと今回の出力を行指紋で突き合わせ、
+追加(I) / 削除(D) / 変更(U) の行だけを差分ファイルに書き出すユーティリティ。
+
+- キーは (日付, 勘定科目, 品目) ＋ 同一キー内の連番
+- スナップショットにはキー列と行ハッシュだけを保存する（全列は持たない）
+- 下流の DB ロードは差分ファイルだけを適用すればよい
+
+連番の引き継ぎ:
+  同じキーの行が複数あるときは、まず前回スナップショットと行ハッシュが同じ行どうしを
+  対応付け、前回の連番をそのまま使う（変化なし）。残った行だけを連番順に組にして U、
+  余った今回の行は空いている連番で I、余った前回の行は D にする。
+  このため同じキーの兄弟行を1行足す・消す・直しても、他の行には差分が出ない。
+
+差分ファイルは実行ごとに <出力名>_delta_<実行ID>.csv として別ファイルで残す（上書きしない）。
+スナップショットは全差分を適用した後の状態を表すので、ローダーは未適用の差分ファイルを
+名前順にすべて適用し、適用済みのものを移動・削除すること。
+"""
+from __future__ import annotations
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+
+KEY_COLS = ["日付", "勘定科目", "品目"]
+SEQ_COL = "連番"
+HASH_COL = "行ハッシュ"
+OP_COL = "op"
+
+def _restore_dtypes(delta: pd.DataFrame, current: pd.DataFrame, cols: list[str]) -> pd.DataFrame:
+    """
+    D 行（値が空）と結合すると整数列が float になる（20240430 → 20240430.0）ので、
+    今回の df の型に戻す。整数・真偽値は欠損を持てる Int64 / boolean にする。
+    """
+    for c in cols:
+        dtype = current[c].dtype
+        if pd.api.types.is_bool_dtype(dtype):
+            delta[c] = delta[c].astype("boolean")
+        elif pd.api.types.is_integer_dtype(dtype):
+            delta[c] = delta[c].astype("Int64" if dtype.kind in "iu" else dtype)
+        elif delta[c].dtype != dtype and pd.api.types.is_numeric_dtype(dtype):
+            delta[c] = delta[c].astype(dtype)
+    return delta
+
+def _canon_text(ser: pd.Series) -> pd.Series:
+    """書き出す CSV と同じ見た目の文字列にそろえる（日付は YYYY-MM-DD、欠損は空文字）"""
+    if pd.api.types.is_datetime64_any_dtype(ser):
+        return ser.dt.strftime("%Y-%m-%d").fillna("")
+    return ser.map(lambda v: "" if pd.isna(v) else str(v))
+
+def fingerprint_rows(df: pd.DataFrame, key_cols: list[str] = KEY_COLS) -> pd.DataFrame:
+    """
+    キー列（文字列化）＋連番＋行ハッシュの表を返す。index は df と同じ。
+    行ハッシュはキー以外の列の内容から作る。連番は前回が無いときの初期値（行ハッシュ順）。
+    """
+    keys = pd.DataFrame({c: _canon_text(df[c]) for c in key_cols}, index=df.index)
+    value_cols = [c for c in df.columns if c not in key_cols]
+    values = pd.DataFrame({c: _canon_text(df[c]) for c in value_cols}, index=df.index)
+    keys[HASH_COL] = pd.util.hash_pandas_object(values, index=False).astype("uint64")
+    # 同一キーの行は並び順が実行ごとに揺れるので、行ハッシュ順に連番を振る
+    ordered = keys.sort_values(key_cols + [HASH_COL], kind="stable")
+    keys[SEQ_COL] = ordered.groupby(key_cols, sort=False).cumcount().reindex(keys.index)
+    return keys[key_cols + [SEQ_COL, HASH_COL]]
+
+def _match_rows(prev: pd.DataFrame, fp: pd.DataFrame, key_cols: list[str]):
+    """
+    前回スナップショットと今回の指紋を対応付け、(今回の連番, I の行, U の行, D の行) を返す。
+    I/U は fp の index、D は前回のキー列＋連番。
+    """
+    cur = fp[key_cols + [HASH_COL]].copy()
+    cur["_row"] = fp.index
+    cur["_occ"] = cur.groupby(key_cols + [HASH_COL]).cumcount()
+    prv = prev.sort_values(key_cols + [SEQ_COL], kind="stable").copy()
+    prv["_occ"] = prv.groupby(key_cols + [HASH_COL]).cumcount()
+
+    # 1) 同じキー・同じ行ハッシュの行は変化なし（前回の連番を引き継ぐ）
+    m = cur.merge(prv, on=key_cols + [HASH_COL, "_occ"], how="outer", indicator=True)
+    same = m[m["_merge"] == "both"]
+    seq = pd.Series(same[SEQ_COL].astype(int).to_numpy(), index=same["_row"].astype(int).to_numpy())
+
+    # 2) 残りをキーごとに順番で組にする：両方あれば U、今回だけなら I、前回だけなら D
+    left = m[m["_merge"] == "left_only"].sort_values(key_cols + [HASH_COL], kind="stable")
+    left = left[key_cols + ["_row"]].assign(_r=left.groupby(key_cols).cumcount())
+    right = m[m["_merge"] == "right_only"].sort_values(key_cols + [SEQ_COL], kind="stable")
+    right = right[key_cols + [SEQ_COL]].assign(_r=right.groupby(key_cols).cumcount())
+    m2 = left.merge(right, on=key_cols + ["_r"], how="outer", indicator=True)
+
+    upd = m2[m2["_merge"] == "both"]
+    seq = pd.concat([seq, pd.Series(upd[SEQ_COL].astype(int).to_numpy(),
+                                     index=upd["_row"].astype(int).to_numpy())])
+
+    ins = m2[m2["_merge"] == "left_only"][key_cols + ["_row"]]
+    if len(ins):
+        # 新しい行の連番は、そのキーで前回使っていた最大の連番の次から
+        top = prev.groupby(key_cols)[SEQ_COL].max().rename("_top").reset_index()
+        ins = ins.merge(top, on=key_cols, how="left")
+        ins["_top"] = ins["_top"].fillna(-1).astype(int)
+        ins_seq = ins["_top"] + 1 + ins.groupby(key_cols).cumcount()
+        seq = pd.concat([seq, pd.Series(ins_seq.to_numpy(), index=ins["_row"].astype(int).to_numpy())])
+
+    deleted = m2[m2["_merge"] == "right_only"][key_cols + [SEQ_COL]].copy()
+    deleted[SEQ_COL] = deleted[SEQ_COL].astype(int)
+    return (seq.reindex(fp.index).astype(int),
+            pd.Index(ins["_row"].astype(int)), pd.Index(upd["_row"].astype(int)),
+            deleted)
+
+def compute_delta(prev: pd.DataFrame | None, current: pd.DataFrame,
+                  key_cols: list[str] = KEY_COLS) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    (差分, 今回のスナップショット) を返す。
+    差分の列: op, キー列, 連番, 今回の値の列（D 行は空）
+    """
+    snap = fingerprint_rows(current, key_cols)
+    join_cols = key_cols + [SEQ_COL]
+    value_cols = [c for c in current.columns if c not in key_cols]
+
+    if prev is None or prev.empty:
+        ins = snap.index
+        upd = snap.index[:0]
+        deleted = snap.iloc[:0][join_cols]
+    else:
+        prev = prev[join_cols + [HASH_COL]].copy()
+        for c in key_cols:
+            prev[c] = prev[c].fillna("").astype(str)
+        prev[SEQ_COL] = prev[SEQ_COL].astype(int)
+        prev[HASH_COL] = prev[HASH_COL].astype("uint64")
+        snap[SEQ_COL], ins, upd, deleted = _match_rows(prev, snap, key_cols)
+
+    parts = []
+    for op, rows in (("I", ins), ("U", upd)):
+        if len(rows):
+            part = snap.loc[rows, join_cols].join(current.loc[rows, value_cols])
+            part.insert(0, OP_COL, op)
+            parts.append(part)
+    if len(deleted):
+        part = deleted.copy()
+        part.insert(0, OP_COL, "D")
+        parts.append(part)
+
+    columns = [OP_COL] + join_cols + value_cols
+    delta = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=columns)
+    delta = _restore_dtypes(delta.reindex(columns=columns), current, value_cols)
+    return delta, snap[join_cols + [HASH_COL]]
+
+def delta_paths(out_csv: str | Path, run_id: str | None = None) -> tuple[Path, Path]:
+    """
+    出力 CSV 名から (差分ファイル, スナップショット) のパスを決める。
+    差分ファイルは <stem>_delta_<run_id>.csv（run_id の既定は実行日時、同名があれば枝番）。
+    """
+    p = Path(out_csv)
+    run_id = run_id or datetime.now().strftime("%Y%m%d-%H%M%S")
+    delta = p.with_name(f"{p.stem}_delta_{run_id}.csv")
+    n = 2
+    while delta.exists():
+        delta = p.with_name(f"{p.stem}_delta_{run_id}-{n}.csv")
+        n += 1
+    return delta, p.with_name(p.stem + "_snapshot.csv")
+
+def pending_deltas(out_csv: str | Path) -> list[Path]:
+    """まだ残っている（ローダーが移動・削除していない）差分ファイルを古い順に返す"""
+    p = Path(out_csv)
+    return sorted(p.parent.glob(f"{p.stem}_delta_*.csv"))
+
+def write_delta(current: pd.DataFrame, out_csv: str | Path,
+                key_cols: list[str] = KEY_COLS, run_id: str | None = None) -> dict[str, int]:
+    """
+    out_csv の前回スナップショットと比べた差分を実行ごとの差分ファイルに書き出し、
+    スナップショットを更新する。差分が無ければファイルは作らない。戻り値は op ごとの件数。
+    """
+    delta_path, snap_path = delta_paths(out_csv, run_id)
+    prev = None
+    if snap_path.exists():
+        prev = pd.read_csv(snap_path, encoding="utf-8-sig", dtype=str, keep_default_na=False)
+    delta, snap = compute_delta(prev, current, key_cols)
+
+    pending = pending_deltas(out_csv)
+    if pending:
+        print(f"[WARN] 未適用の差分ファイルが {len(pending)} 件あります（最古: {pending[0].name}）。"
+              "ローダーは名前順にすべて適用してください。")
+    if len(delta):
+        delta.to_csv(delta_path, index=False, encoding="utf-8-sig")
+    snap.to_csv(snap_path, index=False, encoding="utf-8-sig")
+    counts = delta[OP_COL].value_counts()
+    return {op: int(counts.get(op, 0)) for op in ("I", "U", "D")}
@@ -0,0 +1,278 @@
+# utils_item_canon.py
+"""
+品目（remark_item）の表記ゆれを正規品目に寄せるユーティリティ。
+
+  1) 文字レベルの正規化（NFKC・空白・区切り記号・末尾の日付）
+  2) 正規化後の文字 n-gram 転置索引で候補だけを引き、Dice 係数で類似判定
+  3) 結果を対応表 CSV（(account, raw_item) → canonical_item）に保存し、次回以降は再利用
+
+全組み合わせの比較はせず、n-gram を共有する候補とだけ比べるので
+語彙が年々増えても処理量は候補数に比例する。
+
+索引と対応表は勘定科目ごとに分ける（'役員給与' が '従業員給与' に寄るような科目またぎを防ぐ）。
+括弧内・'・・・' 以降の限定語と英数字（'（残金）'/'（頭金）', '令和4年度'/'令和5年度', 'JA'）が
+違うもの、本体に '代'/'ほか' などの添え字以外の語が足されたもの（'温泉蒸したまご用袋代'）は
+類似度にかかわらず別品目とし、短い品目ほど高い類似度を求める。
+"""
+from __future__ import annotations
+import re
+import unicodedata
+from collections import Counter
+from difflib import SequenceMatcher
+from pathlib import Path
+import pandas as pd
+
+MAP_COLUMNS = ["account", "raw_item", "canonical_item", "similarity", "method"]
+
+# 本体がこの文字数以下の品目は SHORT_THRESHOLD 以上の類似度でしか寄せない
+SHORT_LEN = 6
+SHORT_THRESHOLD = 0.9
+
+# 末尾に付く日付メモ（例: '・・・4月25日', ' 4/25', '(4月分)'）
+RE_TRAILING_DATE = re.compile(
+    r"[\s・･.．、,，]*[(（]?\s*\d{1,2}\s*(?:月\s*\d{1,2}\s*日分?|月分|/\s*\d{1,2})\s*[)）]?\s*$"
+)
+RE_DOTS = re.compile(r"[・･]{2,}|\.{2,}|…+")
+RE_SPACES = re.compile(r"\s+")
+# 限定語：括弧の中身（NFKC 後なので全角括弧は半角になっている）と英数字の語
+RE_BRACKET = re.compile(r"[(【\[]([^()【】\[\]]*)[)】\]]")
+RE_ALNUM = re.compile(r"[a-z0-9]+")
+# 本体どうしの差分がこれだけなら同じ品目とみなす（'代'/'代金'、'ほか'/'他'、'料'/'代' など）
+RE_FILLER = re.compile(r"代金|ほか|代|他|等|類|料|費|用|時|[・,、~]")
+
+def strip_trailing_date(text: str) -> str:
+    """表示用：末尾の日付メモと区切り記号だけを落とす（文字種はそのまま）"""
+    s = str(text).strip()
+    prev = None
+    while prev != s:
+        prev = s
+        s = RE_TRAILING_DATE.sub("", s)
+    return s.rstrip("・･.．、,， ") or str(text).strip()
+
+def normalize_item(text) -> str:
+    """比較用のキー文字列を作る（表示用ではない）"""
+    if text is None or (isinstance(text, float) and pd.isna(text)):
+        return ""
+    s = unicodedata.normalize("NFKC", str(text))
+    s = s.replace("〜", "~").replace("～", "~")
+    s = RE_SPACES.sub("", s)
+    # 日付サフィックスは複数付くことがあるので消えるまで繰り返す
+    prev = None
+    while prev != s:
+        prev = s
+        s = RE_TRAILING_DATE.sub("", s)
+    # '・・・' は限定語の区切りとして '…' にそろえる（列挙の '・' とは区別する）
+    s = RE_DOTS.sub("…", s).strip("・…,、")
+    return s.lower()
+
+def split_qualifiers(norm: str) -> tuple[str, tuple[str, ...]]:
+    """
+    normalize_item の結果を (本体, 限定語) に分ける。
+    限定語は括弧の中身・'…' 以降の語・英数字の語で、並びによらず比較できるよう整列して返す。
+    例: 'ホットショーケース(残金)代' → ('ホットショーケース代', ('残金',))
+    """
+    quals = [q for q in RE_BRACKET.findall(norm) if q]
+    stem, *tails = RE_BRACKET.sub("", norm).split("…")
+    quals += [t.strip("・,、") for t in tails if t.strip("・,、")]
+    stem = stem.strip("・,、")
+    quals += RE_ALNUM.findall(stem)
+    return stem, tuple(sorted(quals))
+
+def differs_only_by_filler(a: str, b: str) -> bool:
+    """
+    2つの本体の差分（挿入・置換された文字）が RE_FILLER の語だけなら True。
+    '佐賀たまねぎ…' と 'たまねぎ…'、'…電波料' と '…電波・制作料' のように
+    前後や途中に語が足されたものは限定語の違いとして False を返す。
+    """
+    extra = []
+    for op, i1, i2, j1, j2 in SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if op != "equal":
+            extra.append(a[i1:i2])
+            extra.append(b[j1:j2])
+    return not RE_FILLER.sub("", "".join(extra))
+
+def account_scope(account) -> str:
+    """勘定科目を索引のスコープ名にそろえる（未指定は ''）"""
+    if account is None or (isinstance(account, float) and pd.isna(account)):
+        return ""
+    return RE_SPACES.sub("", unicodedata.normalize("NFKC", str(account)))
+
+def char_ngrams(s: str, n: int = 2) -> Counter:
+    if not s:
+        return Counter()
+    if len(s) < n:
+        return Counter([s])
+    return Counter(s[i:i + n] for i in range(len(s) - n + 1))
+
+def dice_similarity(a: Counter, b: Counter) -> float:
+    total = sum(a.values()) + sum(b.values())
+    if total == 0:
+        return 0.0
+    shared = sum((a & b).values())
+    return 2.0 * shared / total
+
+class _ItemIndex:
+    """1つの勘定科目内の正規品目と n-gram 転置索引"""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.labels: list[str] = []                 # 正規品目の表示名
+        self.stems: list[str] = []                  # 正規品目の本体
+        self.quals: list[tuple[str, ...]] = []      # 正規品目の限定語
+        self.grams: list[Counter] = []              # 本体の n-gram
+        self.by_norm: dict[str, int] = {}           # 正規化キー → 正規品目ID
+        self.postings: dict[str, set[int]] = {}     # n-gram → 正規品目ID の集合
+
+    def add(self, label: str, norm: str) -> int:
+        cid = len(self.labels)
+        stem, quals = split_qualifiers(norm)
+        grams = char_ngrams(stem or norm, self.n)
+        self.labels.append(label)
+        self.stems.append(stem or norm)
+        self.quals.append(quals)
+        self.grams.append(grams)
+        self.by_norm[norm] = cid
+        for g in grams:
+            self.postings.setdefault(g, set()).add(cid)
+        return cid
+
+    def candidates(self, grams: Counter, min_shared: int) -> list[int]:
+        hits: Counter = Counter()
+        for g in grams:
+            for cid in self.postings.get(g, ()):
+                hits[cid] += 1
+        need = min(min_shared, len(grams))
+        return [cid for cid, c in hits.items() if c >= need]
+
+class ItemCanonicalizer:
+    """
+    勘定科目ごとの n-gram 転置索引つき品目正規化器。
+
+    同じ勘定科目の中に、限定語が一致し、本体の差分が添え字（代・ほか等）だけで、
+    Dice 類似度が閾値以上の既存の正規品目があればそれに寄せ、
+    無ければ新しい正規品目として登録する。
+    閾値は本体が short_len 文字以下なら short_threshold、それ以外は threshold。
+    """
+
+    def __init__(self, threshold: float = 0.8, n: int = 2, min_shared: int = 2,
+                 short_len: int = SHORT_LEN, short_threshold: float = SHORT_THRESHOLD):
+        self.threshold = threshold
+        self.n = n
+        self.min_shared = min_shared
+        self.short_len = short_len
+        self.short_threshold = max(short_threshold, threshold)
+        self._scopes: dict[str, _ItemIndex] = {}
+        # (勘定科目スコープ, raw) → (canonical, sim, method)
+        self.mapping: dict[tuple[str, str], tuple[str, float, str]] = {}
+
+    def _index(self, scope: str) -> _ItemIndex:
+        idx = self._scopes.get(scope)
+        if idx is None:
+            idx = self._scopes[scope] = _ItemIndex(self.n)
+        return idx
+
+    def threshold_for(self, stem_a: str, stem_b: str) -> float:
+        """短い方の本体の長さに応じた閾値"""
+        if min(len(stem_a), len(stem_b)) <= self.short_len:
+            return self.short_threshold
+        return self.threshold
+
+    # ---- 対応表の読み書き ----
+    def load_mapping(self, path: str | Path) -> None:
+        p = Path(path)
+        if not p.exists():
+            return
+        df = pd.read_csv(p, encoding="utf-8-sig", dtype={"account": str, "raw_item": str, "canonical_item": str})
+        if "account" not in df.columns:
+            # 勘定科目を区別しない旧形式は科目またぎの誤りを含みうるので読まずに作り直す
+            print(f"[WARN] {p} は旧形式（account 列なし）のため読み込まずに作り直します。")
+            return
+        for acc, raw, canon, sim, method in df[MAP_COLUMNS].itertuples(index=False):
+            if pd.isna(raw) or pd.isna(canon):
+                continue
+            scope = account_scope(acc)
+            idx = self._index(scope)
+            norm = normalize_item(canon)
+            if norm not in idx.by_norm:
+                idx.add(canon, norm)
+            self.mapping[(scope, raw)] = (canon, float(sim), str(method))
+
+    def save_mapping(self, path: str | Path) -> None:
+        rows = [(scope, raw, canon, sim, method)
+                for (scope, raw), (canon, sim, method) in self.mapping.items()]
+        df = pd.DataFrame(rows, columns=MAP_COLUMNS).sort_values(["account", "canonical_item", "raw_item"])
+        df.to_csv(path, index=False, encoding="utf-8-sig")
+
+    # ---- 正規化 ----
+    def canonicalize(self, raw, account=None) -> str | None:
+        if raw is None or (isinstance(raw, float) and pd.isna(raw)):
+            return None
+        raw = str(raw)
+        scope = account_scope(account)
+        hit = self.mapping.get((scope, raw))
+        if hit is not None:
+            return hit[0]
+
+        norm = normalize_item(raw)
+        if not norm:
+            self.mapping[(scope, raw)] = (raw, 1.0, "exact")
+            return raw
+
+        idx = self._index(scope)
+        cid = idx.by_norm.get(norm)
+        if cid is not None:
+            canon = idx.labels[cid]
+            self.mapping[(scope, raw)] = (canon, 1.0, "exact" if canon == raw else "normalized")
+            return canon
+
+        stem, quals = split_qualifiers(norm)
+        stem = stem or norm
+        grams = char_ngrams(stem, self.n)
+        best_cid, best_sim = None, 0.0
+        for cid in idx.candidates(grams, self.min_shared):
+            # 限定語（残金/頭金、年度、JA など）が違えば別品目
+            if idx.quals[cid] != quals or not differs_only_by_filler(stem, idx.stems[cid]):
+                continue
+            sim = dice_similarity(grams, idx.grams[cid])
+            if sim >= self.threshold_for(stem, idx.stems[cid]) and sim > best_sim:
+                best_cid, best_sim = cid, sim
+
+        if best_cid is not None:
+            canon = idx.labels[best_cid]
+            self.mapping[(scope, raw)] = (canon, round(best_sim, 4), "ngram")
+            # 同じ正規化キーが再度来たら索引を引かずに済むように
+            idx.by_norm[norm] = best_cid
+            return canon
+
+        label = strip_trailing_date(raw)
+        idx.add(label, norm)
+        self.mapping[(scope, raw)] = (label, 1.0, "exact" if label == raw else "normalized")
+        return label
+
+def canonicalize_items(
+    items: pd.Series,
+    mapping_path: str | Path | None = None,
+    threshold: float = 0.8,
+    accounts: pd.Series | None = None,
+) -> tuple[pd.Series, ItemCanonicalizer]:
+    """
+    Series の品目を正規品目に置き換えた Series を返す。
+    accounts（items と同じ index の勘定科目）を渡すと勘定科目ごとに正規化する。
+    出現回数の多い表記から先に登録するので、代表名には最頻の表記が選ばれる。
+    """
+    canon = ItemCanonicalizer(threshold=threshold)
+    if mapping_path is not None:
+        canon.load_mapping(mapping_path)
+
+    if accounts is None:
+        accounts = pd.Series("", index=items.index)
+    pairs = pd.DataFrame({"account": accounts.map(account_scope), "item": items})
+    for acc, raw in pairs.dropna(subset=["item"]).astype(str).value_counts().index:
+        canon.canonicalize(raw, acc)
+
+    out = pd.Series([canon.canonicalize(x, acc) if pd.notna(x) else x
+                     for acc, x in zip(pairs["account"], items)],
+                    index=items.index, dtype=object)
+    if mapping_path is not None:
+        canon.save_mapping(mapping_path)
+    return out, canon
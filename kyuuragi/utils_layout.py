@@ -0,0 +1,94 @@
+# utils_layout.py
+"""
+シートのレイアウト（見出し行の位置・勘定科目列・備考列・備考のラベル/金額列）を
+上部数行の指紋（fingerprint）で覚えておくレジストリ。
+
+同じ様式のブックは各月のシートが同じレイアウトなので、2枚目以降のシートや
+次回以降の実行では見出し行検出・列名検出・備考の役割推定を飛ばして位置で直接読む。
+指紋が一致しても見出し行の中身が違えば（様式変更など）不一致として再検出させる。
+"""
+from __future__ import annotations
+import hashlib
+import json
+import re
+import unicodedata
+from pathlib import Path
+import pandas as pd
+
+LAYOUT_FILE = "layout_registry.json"
+FINGERPRINT_ROWS = 12
+
+_RE_DROP = re.compile(r"[\s\u3000\u2000-\u200B0-9]+")
+
+def _norm_cell(v) -> str:
+    """数字・空白を落とした見出し比較用の文字列（'４月執行額' と '５月執行額' を同一視）"""
+    if v is None or (isinstance(v, float) and pd.isna(v)):
+        return ""
+    if isinstance(v, (int, float)):
+        return "#"
+    return _RE_DROP.sub("", unicodedata.normalize("NFKC", str(v)))
+
+def row_signature(values) -> str:
+    return "|".join(_norm_cell(v) for v in values)
+
+def fingerprint_sheet(raw: pd.DataFrame, n_rows: int = FINGERPRINT_ROWS) -> str:
+    """header=None で読んだシートの列数と上部 n_rows 行から指紋を作る"""
+    h = hashlib.sha1(str(raw.shape[1]).encode("utf-8"))
+    for i in range(min(len(raw), n_rows)):
+        h.update(row_signature(raw.iloc[i].tolist()).encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()[:16]
+
+class LayoutRegistry:
+    """
+    指紋 → レイアウトの対応表（JSON で永続化）。
+
+    レイアウトは次のキーを持つ dict:
+      header_row  : 見出し行の位置（raw の行番号）
+      header_sig  : 見出し行の row_signature（検証用）
+      account_col : 勘定科目列の位置
+      remark_col  : 備考列（見出し名の代表）の位置
+      label_col   : 備考ラベル列の位置
+      amount_col  : 備考金額列の位置（無ければ None）
+    """
+
+    def __init__(self, path: str | Path | None = LAYOUT_FILE):
+        self.path = Path(path) if path else None
+        self.layouts: dict[str, dict] = {}
+        self.hits = 0
+        self.misses = 0
+        if self.path is not None and self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                self.layouts = json.load(f)
+
+    def lookup(self, raw: pd.DataFrame) -> tuple[str, dict | None]:
+        """(指紋, レイアウト or None) を返す。見出し行の中身が合わなければ None"""
+        fp = fingerprint_sheet(raw)
+        layout = self.layouts.get(fp)
+        if layout is not None:
+            hr = layout["header_row"]
+            if hr < len(raw) and row_signature(raw.iloc[hr].tolist()) == layout["header_sig"]:
+                self.hits += 1
+                return fp, layout
+        self.misses += 1
+        return fp, None
+
+    def register(self, fp: str, raw: pd.DataFrame, header_row: int,
+                 account_col: int, remark_col: int,
+                 label_col: int, amount_col: int | None) -> dict:
+        layout = {
+            "header_row": int(header_row),
+            "header_sig": row_signature(raw.iloc[header_row].tolist()),
+            "account_col": int(account_col),
+            "remark_col": int(remark_col),
+            "label_col": int(label_col),
+            "amount_col": None if amount_col is None else int(amount_col),
+        }
+        self.layouts[fp] = layout
+        return layout
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.layouts, f, ensure_ascii=False, indent=2)
@@ -2,7 +2,7 @@
 from __future__ import annotations
 import re, math
 import pandas as pd
-from typing import List, Tuple, Union
+from typing import List, NamedTuple, Tuple, Union
 
 # --- ユーティリティ（半角化/金額パース） --------------------------------
 DIGITS_FW = "０１２３４５６７８９，．"
@@ -62,37 +62,104 @@ def _is_numeric_like(x) -> bool:
         return False
     return parse_amount_token(x) is not None
 
-def pick_remark_label_and_amount_columns(df: pd.DataFrame, remark_name: str) -> tuple[pd.Series, pd.Series | None]:
+class RemarkRoles(NamedTuple):
+    label_idx: int              # ラベル列の位置（df.iloc 用）
+    amount_idx: int | None      # 金額列の位置（無ければ None）
+    confidence: float           # 0..1（ラベル列の文字率と金額列の数値率の小さい方）
+    # "single"（備考が1列）/ "sample"（標本で確定）/ "sample→full"（標本が曖昧で全走査）/
+    # "full"（標本を取るほどセルが無い、または sample_size=None）/ "cached"（レイアウト登録簿）
+    method: str
+
+def _nonempty_cells(col: pd.Series) -> pd.Series:
+    return col[col.notna() & col.astype(str).str.strip().ne("")]
+
+def _stratified_sample(cells: pd.Series, size: int) -> pd.Series:
+    """非空セルを表の上から下まで等間隔に size 件拾う（上部の小計行などに偏らないように）"""
+    n = len(cells)
+    if n <= size:
+        return cells
+    step = n / size
+    return cells.iloc[[int(k * step) for k in range(size)]]
+
+def _role_stats(cols: dict[int, pd.Series], totals: dict[int, int]) -> list[tuple[int, float, float]]:
     """
-    同名 '備考' 列が複数ある場合：
-      - 文字（非数）セルが多い列 → ラベル列
-      - 数値っぽいセルが多い列 → 金額列
-    片方しか無い場合は、金額列は None を返す。
+    列ごとに (位置, 推定数値セル数, 推定文字セル数) を返す。
+    cols は判定に使うセル（全件 or 標本）、totals は各列の非空セル総数。
+    セルのパースは1回だけ。
     """
-    idxs = [i for i, c in enumerate(df.columns) if c == remark_name]
-    if not idxs:
-        raise KeyError(f"備考列が見当たりません: {remark_name}")
-    if len(idxs) == 1:
-        return df.iloc[:, idxs[0]], None
-
-    # 複数ある場合は役割分担
     stats = []
-    for i in idxs:
-        col = df.iloc[:, i]
-        num_cnt = int(col.apply(_is_numeric_like).sum())
-        str_cnt = int((~col.apply(_is_numeric_like)) & col.astype(str).str.strip().ne("")).sum()
-        stats.append((i, num_cnt, str_cnt))
+    for i, cells in cols.items():
+        n = len(cells)
+        num = int(cells.map(_is_numeric_like).sum()) if n else 0
+        scale = totals[i] / n if n else 0.0
+        stats.append((i, num * scale, (n - num) * scale))
+    return stats
+
+def _assign_roles(stats: list[tuple[int, float, float]]) -> tuple[int, int | None, float]:
     # ラベル候補：非数（文字）多い列
-    label_i = sorted(stats, key=lambda t: (t[2], -t[1]), reverse=True)[0][0]
+    label_i, l_num, l_str = sorted(stats, key=lambda t: (t[2], -t[1]), reverse=True)[0]
     # 金額候補：数値多い列（ラベルと同じなら次点）
-    amount_i = None
+    amount_i, a_num, a_str = None, 0.0, 0.0
     for i, num_cnt, str_cnt in sorted(stats, key=lambda t: (t[1], -t[2]), reverse=True):
         if i != label_i and num_cnt > 0:
-            amount_i = i
+            amount_i, a_num, a_str = i, num_cnt, str_cnt
             break
 
-    label_ser = df.iloc[:, label_i]
-    amount_ser = df.iloc[:, amount_i] if amount_i is not None else None
+    label_conf = l_str / (l_num + l_str) if (l_num + l_str) else 0.0
+    if amount_i is None:
+        return label_i, None, label_conf
+    amount_conf = a_num / (a_num + a_str) if (a_num + a_str) else 0.0
+    return label_i, amount_i, min(label_conf, amount_conf)
+
+def infer_remark_roles(
+    df: pd.DataFrame,
+    remark_name: str,
+    sample_size: int | None = 64,
+    min_confidence: float = 0.8,
+) -> RemarkRoles:
+    """
+    同名 '備考' 列のラベル列/金額列を推定する。
+
+    sample_size 件の層化標本（各列の非空セルを上から下まで等間隔に抽出）で判定し、
+    confidence が min_confidence 未満のときだけ全セルを走査し直す。
+    sample_size=None なら最初から全走査。どの経路で決めたかは method に入る
+    （"sample" / 標本が曖昧で全走査した "sample→full" / 最初から全走査の "full"）。
+    """
+    idxs = [i for i, c in enumerate(df.columns) if c == remark_name]
+    if not idxs:
+        raise KeyError(f"備考列が見当たりません: {remark_name}")
+    if len(idxs) == 1:
+        return RemarkRoles(idxs[0], None, 1.0, "single")
+
+    cells = {i: _nonempty_cells(df.iloc[:, i]) for i in idxs}
+    totals = {i: len(c) for i, c in cells.items()}
+
+    method = "full"
+    if sample_size is not None and any(n > sample_size for n in totals.values()):
+        sample = {i: _stratified_sample(c, sample_size) for i, c in cells.items()}
+        label_i, amount_i, conf = _assign_roles(_role_stats(sample, totals))
+        if conf >= min_confidence:
+            return RemarkRoles(label_i, amount_i, conf, "sample")
+        method = "sample→full"
+
+    label_i, amount_i, conf = _assign_roles(_role_stats(cells, totals))
+    return RemarkRoles(label_i, amount_i, conf, method)
+
+def pick_remark_label_and_amount_columns(
+    df: pd.DataFrame,
+    remark_name: str,
+    sample_size: int | None = 64,
+) -> tuple[pd.Series, pd.Series | None]:
+    """
+    同名 '備考' 列が複数ある場合：
+      - 文字（非数）セルが多い列 → ラベル列
+      - 数値っぽいセルが多い列 → 金額列
+    片方しか無い場合は、金額列は None を返す。
+    判定は infer_remark_roles（標本 → 曖昧なら全走査）に任せる。
+    """
+    roles = infer_remark_roles(df, remark_name, sample_size=sample_size)
+    label_ser = df.iloc[:, roles.label_idx]
+    amount_ser = df.iloc[:, roles.amount_idx] if roles.amount_idx is not None else None
     return label_ser, amount_ser
 
 # --- メイン：ロング化 ------------------------------------------------------
@@ -100,12 +167,14 @@ def build_long_records(
     df: pd.DataFrame,
     col_account: str,
     col_remark: Union[str, list[str], pd.Series, pd.DataFrame],
+    with_source_row: bool = False,
 ) -> pd.DataFrame:
     """
     2パターン対応：
       A) 備考セル内が「ラベル + 金額」混在 → 正規表現で抽出
       B) 備考(ラベル)列 + 備考(金額)列が別 → 同名列の役割を自動推定してペア化
     返すカラム: ['account', 'remark_item', 'amount']
+    with_source_row=True なら抽出元の行位置 'src_row'（df.iloc の行番号）も付ける（突合用）
     """
     # 勘定科目は前方埋め（マージセル崩れ対策）
     acc = df[col_account]
@@ -131,7 +200,9 @@ def build_long_records(
 
     records = []
     # 行ごとに処理
-    for a, label_cell, amt_cell in zip(acc, label_ser, amount_ser if amount_ser is not None else label_ser):
+    for row, (a, label_cell, amt_cell) in enumerate(
+        zip(acc, label_ser, amount_ser if amount_ser is not None else label_ser)
+    ):
         label_text = ("" if pd.isna(label_cell) else str(label_cell)).strip()
         if not label_text:
             continue
@@ -140,15 +211,16 @@ def build_long_records(
             # パターンB：列分割型
             v = parse_amount_token(amt_cell)
             if v is not None:
-                records.append({"account": a, "remark_item": label_text, "amount": v})
+                records.append({"account": a, "remark_item": label_text, "amount": v, "src_row": row})
             else:
                 # 金額列が空なら、フォールバックで備考セル内から試す
                 for item, val in extract_pairs_from_inline_remark(label_text):
-                    records.append({"account": a, "remark_item": item, "amount": val})
+                    records.append({"account": a, "remark_item": item, "amount": val, "src_row": row})
         else:
             # パターンA：備考1列にラベル+金額が混在
             pairs = extract_pairs_from_inline_remark(label_text)
             for item, val in pairs:
-                records.append({"account": a, "remark_item": item, "amount": val})
+                records.append({"account": a, "remark_item": item, "amount": val, "src_row": row})
 
-    return pd.DataFrame(records, columns=["account", "remark_item", "amount"])
+    columns = ["account", "remark_item", "amount"] + (["src_row"] if with_source_row else [])
+    return pd.DataFrame(records, columns=columns)
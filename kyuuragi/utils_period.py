@@ -1,8 +1,10 @@
 # utils_period.py
 import pandas as pd
-import calendar, re, os
+import re, os
 from datetime import datetime
 
+from .utils_calendar import REIWA_OFFSET, month_end
+
 def _resolve_sheet_name(xls_path: str, sheet_ref):
     if isinstance(sheet_ref, str):
         return sheet_ref
@@ -57,7 +59,7 @@ def compute_period_end_from_book_and_sheet(xls_path: str, sheet_ref) -> pd.Times
         m4 = re.search(r"[Rr](\d+)[\./\-](1[0-2]|0?[1-9])", s)
         if m4:
             reiwa = int(m4.group(1))
-            year = 2018 + reiwa  # 令和1年=2019
+            year = REIWA_OFFSET + reiwa  # 令和1年=2019
             month = int(m4.group(2))
 
     if month is None:
@@ -66,5 +68,4 @@ def compute_period_end_from_book_and_sheet(xls_path: str, sheet_ref) -> pd.Times
     if year is None:
         year = _infer_year_from_path(xls_path) or datetime.today().year
 
-    last_day = calendar.monthrange(year, month)[1]
-    return pd.Timestamp(year, month, last_day)
+    return pd.Timestamp(month_end(year, month))
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+# save as: yoy_compare.py
+"""
+facts_long（日付, 勘定科目, 品目, 金額）を
+  (会計月, 勘定コード, 品目) → {会計年度: 金額}
+のハッシュ索引に一度だけ畳み込み、任意の年度ペアについて
+前年比（差額・比率）をまとめて出力するスクリプト。
+
+- 会計年度・会計月（4月=1）は utils_calendar のカレンダー表から引く
+- 片方の年度にしか無い品目も status で区別して残す（merge による直積は作らない）
+- 入力に 品目_正規（merge_facts_long の品目正規化）があればそれで突き合わせる。
+  '・・・4月15日' のような日付付きの表記でも年度をまたいで同じキーになる
+"""
+
+import re
+import unicodedata
+import pandas as pd
+
+from .utils_calendar import REIWA_OFFSET, fiscal_columns
+
+INPUT_CSV = "facts_long_merged.csv"
+OUT_CSV   = "facts_yoy.csv"
+# 比較する (基準年度, 比較年度) の組。None なら隣接年度をすべて比較
+FISCAL_PAIRS = None
+
+RE_ACCOUNT_CODE = re.compile(r"[(（]\s*([0-9０-９]+[A-Za-zＡ-Ｚａ-ｚ]?)\s*[)）]")
+
+def account_key(name) -> str:
+    """'商品売上高（4111）' → '4111'。コードが無い科目は正規化した科目名をキーにする"""
+    if pd.isna(name):
+        return ""
+    s = unicodedata.normalize("NFKC", str(name)).strip()
+    m = RE_ACCOUNT_CODE.search(s)
+    if m:
+        return m.group(1).upper()
+    return re.sub(r"\s+", "", s)
+
+def item_key(item) -> str:
+    if pd.isna(item):
+        return ""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", str(item))).strip()
+
+def build_yoy_index(df: pd.DataFrame,
+                    date_col: str = "日付",
+                    account_col: str = "勘定科目",
+                    item_col: str = "品目",
+                    amount_col: str = "金額",
+                    canon_col: str = "品目_正規") -> tuple[dict, dict]:
+    """
+    1パスで索引を構築する。
+      index[(会計月, 勘定キー, 品目キー)][会計年度] = 金額合計
+      labels[(会計月, 勘定キー, 品目キー)] = (表示用の勘定科目, 品目)
+    canon_col が df にあれば品目キー・表示名ともその列（正規品目）から作る。
+    キーは複数年度・複数表記をまとめたものなので、特定の表記（日付付きなど）は表示しない。
+    """
+    fiscal = fiscal_columns(df[date_col])
+    amounts = pd.to_numeric(df[amount_col], errors="coerce")
+    items = df[item_col]
+    if canon_col in df.columns:
+        items = df[canon_col].where(df[canon_col].notna(), items)
+
+    index: dict[tuple, dict[int, float]] = {}
+    labels: dict[tuple, tuple[str, str]] = {}
+    for fy, fm, acc, item, amt in zip(fiscal["会計年度"], fiscal["会計月"], df[account_col], items, amounts):
+        if pd.isna(fy) or pd.isna(amt):
+            continue
+        fy, fm = int(fy), int(fm)
+        key = (fm, account_key(acc), item_key(item))
+        by_year = index.setdefault(key, {})
+        by_year[fy] = by_year.get(fy, 0.0) + float(amt)
+        labels.setdefault(key, ("" if pd.isna(acc) else str(acc), key[2]))
+    return index, labels
+
+def fiscal_years_in(index: dict) -> list[int]:
+    return sorted({fy for by_year in index.values() for fy in by_year})
+
+def compare_years(index: dict, labels: dict, pairs: list[tuple[int, int]]) -> pd.DataFrame:
+    """
+    索引を1回走査し、指定した全ての (基準年度, 比較年度) について差額・比率を出す。
+    status: both / base_only / cmp_only
+    """
+    rows = []
+    for key, by_year in index.items():
+        fm, acc_key, _ = key
+        acc_label, item_label = labels[key]
+        for base_fy, cmp_fy in pairs:
+            has_base = base_fy in by_year
+            has_cmp = cmp_fy in by_year
+            if not has_base and not has_cmp:
+                continue
+            base_amt = by_year.get(base_fy, 0.0)
+            cmp_amt = by_year.get(cmp_fy, 0.0)
+            if has_base and has_cmp:
+                status = "both"
+            elif has_base:
+                status = "base_only"
+            else:
+                status = "cmp_only"
+            rows.append({
+                "基準年度": base_fy,
+                "比較年度": cmp_fy,
+                "会計月": fm,
+                "勘定コード": acc_key,
+                "勘定科目": acc_label,
+                "品目": item_label,
+                "基準金額": base_amt,
+                "比較金額": cmp_amt,
+                "差額": cmp_amt - base_amt,
+                "比率": (cmp_amt / base_amt) if base_amt else None,
+                "status": status,
+            })
+
+    cols = ["基準年度", "比較年度", "会計月", "勘定コード", "勘定科目", "品目",
+            "基準金額", "比較金額", "差額", "比率", "status"]
+    out = pd.DataFrame(rows, columns=cols)
+    return out.sort_values(["基準年度", "比較年度", "会計月", "勘定コード", "品目"]).reset_index(drop=True)
+
+def reiwa_label(fy: int) -> str:
+    return f"令和{fy - REIWA_OFFSET}年度"
+
+def main():
+    df = pd.read_csv(INPUT_CSV, encoding="utf-8-sig")
+    index, labels = build_yoy_index(df)
+
+    years = fiscal_years_in(index)
+    pairs = FISCAL_PAIRS or list(zip(years, years[1:]))
+    if not pairs:
+        raise RuntimeError(f"比較できる年度の組がありません（検出年度: {years}）。")
+
+    result = compare_years(index, labels, pairs)
+    result.to_csv(OUT_CSV, index=False, encoding="utf-8-sig")
+
+    print(f"[OK] {OUT_CSV} を出力しました。行数={len(result)} / 索引キー数={len(index)}")
+    for base_fy, cmp_fy in pairs:
+        sub = result[(result["基準年度"] == base_fy) & (result["比較年度"] == cmp_fy)]
+        counts = sub["status"].value_counts().to_dict()
+        print(f"  {reiwa_label(base_fy)} → {reiwa_label(cmp_fy)}: 差額合計={sub['差額'].sum():,.0f} / {counts}")
+
+if __name__ == "__main__":
+    main()